@@ -0,0 +1,293 @@
+"""
+Deterministic stand-ins for Gemini and DuckDuckGo used by the offline benchmarks.
+
+The fake chat model recognises each prompt in `workflow/prompts.py` by a fixed
+phrase and answers with canned content that points at the local fixture server,
+so a full `WorkflowGraph.run` exercises every node without network access.
+"""
+import json
+import re
+import threading
+from collections import Counter
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+# Set by the benchmark runner once the fixture server is listening
+BASE_URL = "http://127.0.0.1:8000"
+
+SEARCH_STATS: Counter[str] = Counter()
+_stats_lock = threading.Lock()
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        SEARCH_STATS.clear()
+
+
+def _record(stats: Counter[str], **amounts: int) -> None:
+    with _stats_lock:
+        stats.update(amounts)
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that answers workflow prompts with canned, deterministic responses.
+    """
+    model: str = "fake"
+    temperature: float = 0
+    tool_names: list[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-workflow-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: list[Any], **kwargs: Any) -> "FakeChatModel":
+        names = [getattr(tool, "name", None) or getattr(
+            tool, "__name__", str(tool)) for tool in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages)
+
+        input_tokens = sum(len(_text(m)) for m in messages) // 4
+        output_tokens = (len(_text(message)) + len(json.dumps(
+            [call["args"] for call in message.tool_calls]))) // 4
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _tool(self, keyword: str) -> str:
+        return next((name for name in self.tool_names if keyword in name), keyword)
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        system = "\n".join(_text(m)
+                           for m in messages if isinstance(m, SystemMessage))
+        humans = [_text(m) for m in messages if isinstance(m, HumanMessage)]
+        human = humans[-1] if humans else ""
+
+        if "Candidate packages" in human:
+            return AIMessage(content=_match_package(human))
+        if "Return ONLY a JSON list" in human:
+            return AIMessage(content=_batch_verdicts(human))
+        if "Should this URL be kept?" in human:
+            verdict = "REMOVE" if "outdated" in human else "KEEP"
+            return AIMessage(content=f"{verdict}: canned benchmark verdict")
+        if "You are analyzing vendor documentation" in human:
+            return AIMessage(content=SUMMARY_RESPONSE)
+        if "Reconcile the vendor setup steps" in human:
+            steps = human.split("Vendor Setup Steps:", 1)[1].split("```")[1]
+            return AIMessage(content=steps.strip())
+        if "Remove the following URLs" in human:
+            document = human.split("```")[1] if "```" in human else ""
+            return AIMessage(content=document.strip())
+        if "TOOL USAGE IS MANDATORY" in system:
+            return self._research_step(messages)
+        if "package identification specialist" in system:
+            return AIMessage(content="acme_firewall")
+        if "extract and organize" in system:
+            return AIMessage(content=CONTEXT_RESPONSE)
+        if "comprehensive system documentation" in system:
+            return AIMessage(content=final_document())
+        return AIMessage(content="OK")
+
+    def _research_step(self, messages: list[BaseMessage]) -> AIMessage:
+        """
+        search -> fetch -> summarize -> answer, like the real research agent.
+        """
+        # The search tool keeps its backend's name, e.g. "duckduckgo_results_json"
+        from workflow.tools import get_web_search_tool  # pylint: disable=import-outside-toplevel
+
+        last = messages[-1]
+        step = len([m for m in messages if isinstance(m, ToolMessage)])
+        if not isinstance(last, ToolMessage) or step == 0:
+            return _tool_call(get_web_search_tool().name, {"query": "acme firewall syslog configuration"}, step)
+        if step == 1:
+            return _tool_call(self._tool("fetch_url"), {"url": f"{BASE_URL}/acme/syslog-setup.html"}, step)
+        if step == 2:
+            return _tool_call(self._tool("summarize"), {"page_content": _text(last)}, step)
+        return AIMessage(content=SETUP_RESPONSE.format(base_url=BASE_URL))
+
+
+def _tool_call(name: str, args: dict[str, Any], step: int) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{
+        "name": name,
+        "args": args,
+        "id": f"call_{step}",
+        "type": "tool_call",
+    }])
+
+
+def _match_package(prompt: str) -> str:
+    listing = prompt.split("Candidate packages", 1)[1].split("\n\n", 1)[0]
+    packages = re.findall(r"^- ([^:\s]+):", listing, re.MULTILINE)
+    user_input = prompt.split("User input:", 1)[1].split("\n", 1)[0]
+    normalized = re.sub(r"[^a-z0-9]+", "_", user_input.lower()).strip("_")
+    return normalized if normalized in packages else ""
+
+
+def _batch_verdicts(prompt: str) -> str:
+    verdicts = []
+    for item_id, url in re.findall(r"\[(\d+)\] URL: (\S+)", prompt):
+        verdict = "REMOVE" if "outdated" in url else "KEEP"
+        verdicts.append({"id": int(item_id), "verdict": verdict,
+                        "reason": "canned benchmark verdict"})
+    return json.dumps(verdicts)
+
+
+class _SearchInput(BaseModel):
+    query: str = Field(description="search query to look up")
+
+
+class FakeSearchResults(BaseTool):
+    """
+    Drop-in replacement for `DuckDuckGoSearchResults` returning fixture pages.
+    """
+    name: str = "duckduckgo_results_json"
+    description: str = "A wrapper around Duck Duck Go Search. Input should be a search query."
+    args_schema: type[BaseModel] = _SearchInput
+    max_results: int = 10
+
+    def _run(self, query: str, run_manager: Any = None) -> str:
+        _record(SEARCH_STATS, queries=1)
+        return ", ".join(
+            f"snippet: {snippet}, title: {title}, link: {BASE_URL}{path}"
+            for title, path, snippet in SEARCH_RESULTS
+        )
+
+
+SEARCH_RESULTS = [
+    ("Configuring Remote Syslog | Acme Docs", "/acme/syslog-setup.html",
+     "Acme Firewall can forward traffic, threat and system events to remote syslog servers."),
+    ("Troubleshooting Remote Logging | Acme Docs", "/acme/troubleshooting.html",
+     "Common problems when forwarding Acme Firewall logs to a remote syslog server."),
+    ("Acme Firewall Overview | Acme Docs", "/acme/overview.html",
+     "Acme Firewall is a next-generation firewall appliance."),
+]
+
+SUMMARY_RESPONSE = """RELEVANT: Yes
+
+SUMMARY:
+The page explains how to forward Acme Firewall logs to a remote syslog server.
+
+SETUP_INSTRUCTIONS:
+1. Navigate to System > Logging > Remote Syslog.
+2. Add the collector address and port 9514 over TCP.
+3. Select RFC5424 format and facility local7, then save and commit.
+
+CONFIGURATION_DETAILS:
+Port 9514, TCP/UDP/TLS, RFC5424, facility local7."""
+
+CONTEXT_RESPONSE = """## Product Information
+- **Product**: Acme Firewall
+- **Compatible Versions**: Acme Firewall OS 7.2 and 7.4
+
+## Setup Method
+- **Protocol**: Syslog (TCP or UDP)
+- **Configuration Location**: System > Logging > Remote Syslog
+
+## Configuration Details
+- **Port**: 9514
+- **Format**: RFC5424"""
+
+SETUP_RESPONSE = """## Setup Steps
+1. Log in to the Acme Firewall web console as an administrator.
+2. Navigate to **System > Logging > Remote Syslog**.
+3. Click **Add Server** and enter the Elastic Agent host address.
+4. Set the port to 9514 and the protocol to TCP.
+5. Select the RFC5424 format and the local7 facility.
+6. Enable the Traffic, Threat and System categories, then save and commit.
+
+## Reference
+- [Configuring Remote Syslog]({base_url}/acme/syslog-setup.html)"""
+
+
+def final_document() -> str:
+    return f"""# Service Info
+
+## Common use cases
+
+- Monitor allowed and blocked traffic across Acme Firewall clusters.
+- Detect threats reported by the inline prevention engine.
+
+## Data types collected
+
+Traffic, threat and system logs.
+
+## Compatibility
+
+Acme Firewall OS 7.2 and 7.4. See the [product overview]({BASE_URL}/acme/overview.html).
+
+## Scaling and Performance
+
+Use TCP or TLS for high-volume deployments.
+
+# Set Up Instructions
+
+## Vendor prerequisites
+
+Administrator access to the Acme Firewall web console.
+
+## Elastic prerequisites
+
+An Elastic Agent with the Acme Firewall integration installed.
+
+## Vendor set up steps
+
+1. Navigate to **System > Logging > Remote Syslog**.
+2. Add the Elastic Agent host on port 9514 over TCP.
+3. Select RFC5424 and save.
+
+- [Configuring Remote Syslog]({BASE_URL}/acme/syslog-setup.html)
+- [Legacy logging guide]({BASE_URL}/acme/outdated-guide.html)
+
+## Kibana set up steps
+
+Add the Acme Firewall integration and set the listening port to 9514.
+
+# Validation Steps
+
+Send a test message with `test logging remote` and check the dashboards.
+
+# Troubleshooting
+
+## Common Configuration Issues
+
+Check connectivity to the collector port.
+
+## Ingestion Errors
+
+Switch to TCP if messages are truncated.
+
+## API Authentication Errors
+
+Not specified.
+
+## Vendor Resources
+
+- [Troubleshooting Remote Logging]({BASE_URL}/acme/troubleshooting.html)
+- [Log forwarding FAQ]({BASE_URL}/acme/missing.html)
+* {BASE_URL}/acme/outdated-guide.html
+- Older firmware: <{BASE_URL}/acme/outdated-guide.html>
+
+# Documentation sites
+
+- [Acme Firewall Overview]({BASE_URL}/acme/overview.html)
+- [REST API Reference]({BASE_URL}/acme/api.html)
+"""
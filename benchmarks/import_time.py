@@ -0,0 +1,143 @@
+"""
+Import-time benchmark for the `workflow` package.
+
+Imports the package in fresh interpreters, reports the median wall time and the
+slowest modules from `python -X importtime`, and checks that the heavy optional
+dependencies are not loaded until they are first used. Exits non-zero when a
+heavy module is imported eagerly or the median exceeds `--max-seconds`.
+
+Usage:
+    uv run python -m benchmarks.import_time
+    uv run python -m benchmarks.import_time --max-seconds 2 --statement "import main"
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+# Imported on first use only; importing any of these with the package is a regression
+DEFERRED_MODULES = [
+    "playwright",
+    "bs4",
+    "langchain_community",
+    "langchain_google_genai",
+    "langchain.agents",
+    "phoenix",
+]
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+# e.g. "import time:       412 |       8034 | langchain_core.runnables"
+_IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _environment() -> dict[str, str]:
+    env = dict(os.environ)
+    # Importing must work without any configuration
+    env.pop("INTEGRATION_ROOT_PATH", None)
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    return env
+
+
+def measure_once(statement: str) -> tuple[dict[str, Any], list[tuple[str, float]]]:
+    """
+    Runs `statement` in a fresh interpreter.
+
+    Returns:
+        tuple: The probe result (seconds, deferred modules loaded) and the top-level
+        modules with their cumulative import time in seconds.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         _PROBE.format(statement=statement, deferred=DEFERRED_MODULES)],
+        capture_output=True, text=True, cwd=_REPO_ROOT, env=_environment(), check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{completed.stderr.strip()[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_PATTERN.match(line)
+        if match and len(match.group(3)) <= 1:
+            modules.append((match.group(4), int(match.group(2)) / 1_000_000))
+    return json.loads(completed.stdout.strip().splitlines()[-1]), modules
+
+
+def run_benchmark(statement: str, repeat: int, top: int) -> dict[str, Any]:
+    """
+    Measures `statement` `repeat` times and reports the median.
+    """
+    seconds = []
+    loaded: set[str] = set()
+    cumulative: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        result, modules = measure_once(statement)
+        seconds.append(result["seconds"])
+        loaded.update(result["loaded"])
+        for name, module_seconds in modules:
+            cumulative.setdefault(name, []).append(module_seconds)
+
+    slowest = sorted(((name, statistics.median(samples)) for name, samples in cumulative.items()),
+                     key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "statement": statement,
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "median_s": round(statistics.median(seconds), 4),
+        "min_s": round(min(seconds), 4),
+        "eagerly_loaded": sorted(loaded),
+        "slowest_modules": [{"module": name, "cumulative_s": round(s, 4)} for name, s in slowest],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--statement", type=str, default="import workflow",
+                        help="Python statement to time")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15,
+                        help="Number of slowest top-level imports to list")
+    parser.add_argument("--max-seconds", type=float,
+                        help="Fail when the median import time exceeds this budget")
+    parser.add_argument("--output", type=str,
+                        help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.statement, args.repeat, args.top)
+
+    print(f"{report['statement']}: median {report['median_s']:.3f}s, "
+          f"min {report['min_s']:.3f}s over {report['repeat']} runs")
+    print(f"\n{'module':<50}{'cumulative_s':>14}")
+    print("-" * 64)
+    for module in report["slowest_modules"]:
+        print(f"{module['module']:<50}{module['cumulative_s']:>14.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    failed = False
+    if report["eagerly_loaded"]:
+        print(f"\nLoaded at import time but should be deferred: {', '.join(report['eagerly_loaded'])}")
+        failed = True
+    if args.max_seconds is not None and report["median_s"] > args.max_seconds:
+        print(f"\nMedian import time {report['median_s']:.3f}s exceeds the {args.max_seconds:.3f}s budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
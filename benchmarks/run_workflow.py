@@ -0,0 +1,322 @@
+"""
+Offline end-to-end benchmark for `WorkflowGraph.run`.
+
+Runs the whole graph against fake Gemini responses, a stubbed web search tool and
+a local HTTP server serving fixture vendor pages, then reports the per-node run
+metrics from `WorkflowGraph.run_with_metrics`, plus import time and peak RSS, as JSON.
+
+Usage:
+    uv run python -m benchmarks.run_workflow --output bench.json
+    uv run python -m benchmarks.run_workflow --compare bench.json
+    uv run python -m benchmarks.run_workflow --stream
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+SITE_DIR = os.path.join(FIXTURES_DIR, "site")
+INTEGRATIONS_DIR = os.path.join(FIXTURES_DIR, "integrations")
+
+FETCH_STATS: Counter[str] = Counter()
+_fetch_lock = threading.Lock()
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    Serves fixture pages and counts requests by method.
+    """
+
+    def do_GET(self) -> None:
+        with _fetch_lock:
+            FETCH_STATS["GET"] += 1
+        super().do_GET()
+
+    def do_HEAD(self) -> None:
+        with _fetch_lock:
+            FETCH_STATS["HEAD"] += 1
+        super().do_HEAD()
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+
+def start_fixture_server() -> ThreadingHTTPServer:
+    """
+    Starts the fixture server on a free local port.
+    """
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_FixtureHandler, directory=SITE_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure_environment(cache_dir: str) -> None:
+    """
+    Points the workflow at the fixtures.
+    Must run before `workflow` is imported, which reads these settings once.
+    """
+    os.environ["INTEGRATION_ROOT_PATH"] = INTEGRATIONS_DIR
+    os.environ["DEBUG"] = "false"
+    os.environ["FETCH_CACHE_DIR"] = os.path.join(cache_dir, "pages")
+    os.environ["LLM_CACHE_DIR"] = os.path.join(cache_dir, "llm")
+    os.environ["SEARCH_CACHE_DIR"] = os.path.join(cache_dir, "search")
+    os.environ["PACKAGE_CACHE_DIR"] = os.path.join(cache_dir, "packages")
+    os.environ["PACKAGE_INDEX_PATH"] = os.path.join(cache_dir, "package_index.json")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+
+def install_fakes() -> None:
+    """
+    Swaps Gemini and DuckDuckGo for fakes through the workflow's override hooks.
+    """
+    # pylint: disable=import-outside-toplevel
+    from benchmarks.fakes import FakeChatModel, FakeSearchResults
+    from workflow.cache import get_llm_cache
+    from workflow.constants import FLASH_MODEL, PRO_MODEL
+    from workflow.models import set_models
+    from workflow.tools import set_web_search_tool
+
+    set_models(
+        pro=FakeChatModel(model=PRO_MODEL, cache=get_llm_cache()),
+        flash=FakeChatModel(model=FLASH_MODEL, cache=get_llm_cache()),
+    )
+    set_web_search_tool(FakeSearchResults(max_results=10))
+
+
+def _stream_with_metrics(graph: Any, state: dict[str, Any]) -> tuple[dict[str, Any], Any, int]:
+    """
+    Streams the graph the way `main.py --stream` does, returning the final state, the
+    metrics and the number of characters streamed from `final_result_generation`.
+    """
+    # pylint: disable=import-outside-toplevel
+    from langchain_core.messages import AIMessage
+    from workflow import RunMetrics
+    from workflow.metrics import stream_node_name
+
+    result = dict(state)
+    metrics = RunMetrics()
+    streamed = 0
+    for namespace, mode, chunk in graph.stream(state, stream_mode=["updates", "messages"], metrics=metrics):
+        if mode == "updates":
+            if not namespace:
+                for update in chunk.values():
+                    result.update(update or {})
+            continue
+        message, metadata = chunk
+        if isinstance(message, AIMessage) and stream_node_name(namespace, metadata) == "final_result_generation":
+            streamed += len(message.text)
+    return result, metrics, streamed
+
+
+def _check_url_removal(final_result: str) -> None:
+    """
+    Checks that the URLs the fakes reject, linked, bare and as <autolinks>, left
+    nothing behind in the final document, such as an emptied list marker or bracket.
+    """
+    leftovers = [line for line in final_result.splitlines()
+                 if "outdated" in line or re.fullmatch(r"\s*(?:[-*+]|\d+[.)])\s*", line)
+                 or re.search(r"<\s*(?:>|$)|\(\s*\)", line)]
+    if leftovers:
+        raise RuntimeError(f"URL removal left {leftovers} in the final document")
+
+
+def run_once(graph: Any, product: str, stream: bool = False) -> dict[str, Any]:
+    """
+    Runs the graph once with metrics collection enabled, streaming it when asked to.
+    """
+    from langchain_core.messages import HumanMessage  # pylint: disable=import-outside-toplevel
+    from benchmarks import fakes  # pylint: disable=import-outside-toplevel
+    from workflow import default_state  # pylint: disable=import-outside-toplevel
+
+    state = default_state()
+    state["messages"] = [HumanMessage(content=product)]
+
+    fakes.reset_stats()
+    with _fetch_lock:
+        FETCH_STATS.clear()
+
+    if stream:
+        result, metrics, streamed = _stream_with_metrics(graph, state)
+        if not streamed:
+            raise RuntimeError("No text was streamed from final_result_generation")
+    else:
+        result, metrics = graph.run_with_metrics(state)
+    _check_url_removal(result["final_result"])
+
+    report = metrics.to_dict()
+    if stream:
+        report["totals"]["streamed_chars"] = streamed
+    # What actually reached the fixture server and the search stub, as a cross-check
+    report["totals"]["server_gets"] = FETCH_STATS["GET"]
+    report["totals"]["server_heads"] = FETCH_STATS["HEAD"]
+    report["totals"]["search_queries"] = fakes.SEARCH_STATS["queries"]
+    # Cached searches count too; none at all means the research agent never reached the tool
+    if not report["totals"].get("web_searches"):
+        raise RuntimeError("No web search was recorded; the fake research agent did not call the search tool")
+    return report
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round((self_rss + children_rss) / scale, 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(product: str, repeat: int, warm_cache: bool, parallel_research: bool = False,
+                  reconcile: bool = False, stream: bool = False) -> dict[str, Any]:
+    """
+    Runs the benchmark `repeat` times and reports the median of each metric.
+    """
+    from benchmarks import fakes  # pylint: disable=import-outside-toplevel
+
+    server = start_fixture_server()
+    fakes.BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+
+    import_started = time.perf_counter()
+    from workflow import get_graph  # pylint: disable=import-outside-toplevel
+    import_s = time.perf_counter() - import_started
+    install_fakes()
+
+    build_started = time.perf_counter()
+    graph = get_graph(parallel_research=parallel_research, reconcile=reconcile)
+    build_s = time.perf_counter() - build_started
+
+    runs = []
+    try:
+        for _ in range(repeat):
+            if not warm_cache:
+                _clear_caches()
+            runs.append(run_once(graph, product, stream=stream))
+    finally:
+        server.shutdown()
+
+    nodes = {
+        name: _median(run["nodes"].get(name, {}) for run in runs)
+        for name in runs[0]["nodes"]
+    }
+    totals = _median(run["totals"] for run in runs)
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "product": product,
+        "repeat": repeat,
+        "warm_cache": warm_cache,
+        "parallel_research": parallel_research,
+        "reconcile": reconcile,
+        "stream": stream,
+        "import_s": round(import_s, 4),
+        "graph_build_s": round(build_s, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+        "totals": totals,
+        "nodes": nodes,
+    }
+
+
+def _median(samples: Any) -> dict[str, float]:
+    samples = list(samples)
+    keys = {key for sample in samples for key in sample}
+    return {key: statistics.median(sample.get(key, 0) for sample in samples) for key in sorted(keys)}
+
+
+def _clear_caches() -> None:
+    from workflow.cache import get_llm_cache, get_page_cache, get_search_cache  # pylint: disable=import-outside-toplevel
+
+    for cache in (get_page_cache(), get_llm_cache(), get_search_cache()):
+        if cache is not None:
+            cache.clear()
+
+
+def print_report(report: dict[str, Any], baseline: dict[str, Any] | None = None) -> None:
+    """
+    Prints the per-node table, with deltas against a baseline report when given.
+    """
+    columns = ["wall_s", "cpu_s", "llm_calls", "prompt_tokens",
+               "completion_tokens", "fetches", "cache_hits", "bytes_downloaded"]
+    header = f"{'node':<34}" + "".join(f"{column:>19}" for column in columns)
+    print(header)
+    print("-" * len(header))
+
+    rows = list(report["nodes"].items()) + [("TOTAL", report["totals"])]
+    for name, stats in rows:
+        base = (baseline or {}).get("nodes", {}).get(name) if name != "TOTAL" \
+            else (baseline or {}).get("totals")
+        cells = []
+        for column in columns:
+            value = stats.get(column, 0)
+            cell = f"{value:.3f}" if column in ("wall_s", "cpu_s") else f"{int(value)}"
+            if base is not None and base.get(column):
+                cell += f" ({(value - base[column]) / base[column]:+.0%})"
+            cells.append(f"{cell:>19}")
+        print(f"{name:<34}" + "".join(cells))
+
+    totals = report["totals"]
+    print(f"\nserver GETs {int(totals['server_gets'])}, server HEADs {int(totals['server_heads'])}, "
+          f"web searches {int(totals.get('web_searches', 0))}, search queries {int(totals['search_queries'])}")
+    print(f"import {report['import_s']:.3f}s, graph build {report['graph_build_s']:.3f}s, "
+          f"peak RSS {report['peak_rss_mb']} MB, commit {report['commit']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--product", type=str, default="Acme Firewall")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Keep the page, search and LLM caches between runs")
+    parser.add_argument("--parallel-research", action="store_true",
+                        help="Run local-doc analysis and web research concurrently")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="Add the reconciliation pass in parallel research mode")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the runs and check that the final document is streamed")
+    parser.add_argument("--output", type=str,
+                        help="Write the JSON report to this file")
+    parser.add_argument("--compare", type=str,
+                        help="Show deltas against a previous JSON report")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="workflow-bench-") as cache_dir:
+        configure_environment(cache_dir)
+        report = run_benchmark(args.product, args.repeat, args.warm_cache,
+                               parallel_research=args.parallel_research, reconcile=args.reconcile,
+                               stream=args.stream)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,30 @@
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from langchain_core.messages import HumanMessage
-from phoenix.otel import register
+from langchain_core.messages import AIMessage, HumanMessage
 
-from workflow import get_graph, default_state
+from workflow import WorkflowGraph, RunMetrics, get_graph, default_state
+from workflow.cache import get_llm_cache
+from workflow.checkpoint import get_sqlite_checkpointer, thread_id_for
+from workflow.package_store import get_package_store
+from workflow.metrics import stream_node_name
+from workflow.rate_limit import llm_priority, rate_limiter_stats
 
 
-# configure the Phoenix tracer
-tracer_provider = register(
-    project_name="system-info-workflow",
-    auto_instrument=True
-)
+def configure_tracing():
+    """
+    Configure the Phoenix tracer. Only done when running the CLI, so importing this
+    module (or running `--help`) does not pay for the OpenTelemetry setup.
+    """
+    from phoenix.otel import register  # pylint: disable=import-outside-toplevel
+
+    return register(
+        project_name="system-info-workflow",
+        auto_instrument=True
+    )
+
 
 def write_to_file(result: str, file_name: str):
     """
@@ -22,15 +36,42 @@ def write_to_file(result: str, file_name: str):
         f.write(result)
 
 
-def run(product_name: str):
+def build_graph(checkpoint: bool = False) -> WorkflowGraph:
     """
-    Run the workflow.
+    Build the graph, saving checkpoints to the local SQLite database when requested.
     """
-    graph = get_graph()
-    state = default_state()
-    state["messages"] = [HumanMessage(content=product_name)]
+    return get_graph(checkpointer=get_sqlite_checkpointer() if checkpoint else None)
+
+
+def run_product(graph: WorkflowGraph, product_name: str, show_metrics: bool = False,
+                resume: bool = False, rerun_from: str | None = None) -> str | None:
+    """
+    Run the workflow for one product on an already built graph.
+
+    When the graph has a checkpointer, runs are checkpointed under the product's name.
+    `resume` continues the last run from the node that failed, or starts a new run if
+    there is none; `rerun_from` re-executes that node and everything after it.
+    Returns the name of the file written, if any.
+    """
+    thread_id = thread_id_for(product_name) if graph.checkpointer is not None else None
+    metrics = RunMetrics() if show_metrics else None
+
+    if resume and graph.has_checkpoint(thread_id):
+        print(f"Resuming {product_name} from its last checkpoint")
+        result = graph.resume(thread_id, metrics=metrics)
+    elif rerun_from:
+        print(f"Re-running {product_name} from {rerun_from}")
+        result = graph.rerun_from(thread_id, rerun_from, metrics=metrics)
+    else:
+        state = default_state()
+        state["messages"] = [HumanMessage(content=product_name)]
+        if show_metrics:
+            result, metrics = graph.run_with_metrics(state, thread_id=thread_id)
+        else:
+            result = graph.run(state, thread_id=thread_id)
 
-    result = graph.run(state)
+    if metrics is not None:
+        print(f"[{product_name}]\n{metrics.format_table()}")
 
     if result:
         integration_name = result["integration_name"]
@@ -39,15 +80,200 @@ def run(product_name: str):
         content = result.get("final_result", "")
         write_to_file(content, file_name)
         print(f"System info for {product_name} written to file: {file_name}")
+        return file_name
+
+    print(f"No result for {product_name}")
+    return None
+
+
+PROVISIONAL_NOTICE = "<!-- Provisional: URL verification is still running -->\n\n"
+
+
+def stream_product(graph: WorkflowGraph, product_name: str, show_metrics: bool = False) -> str | None:
+    """
+    Run the workflow for one product, printing each node as it starts and finishes.
+
+    The text of `final_result_generation` is printed as it is generated. A provisional
+    file is written as soon as that node finishes and is rewritten in place once URL
+    verification is done.
+    Returns the name of the file written.
+    """
+    state = default_state()
+    state["messages"] = [HumanMessage(content=product_name)]
+    metrics = RunMetrics() if show_metrics else None
+    thread_id = thread_id_for(product_name) if graph.checkpointer is not None else None
+
+    result = dict(state)
+    started = time.perf_counter()
+    in_tokens = False
+
+    for namespace, mode, chunk in graph.stream(state, stream_mode=["tasks", "updates", "messages"],
+                                               metrics=metrics, thread_id=thread_id):
+        if mode == "messages":
+            message, metadata = chunk
+            # Token chunks, or the whole message from a model that does not stream
+            if (isinstance(message, AIMessage) and message.text
+                    and stream_node_name(namespace, metadata) == "final_result_generation"):
+                print(message.text, end="", flush=True)
+                in_tokens = True
+            continue
+        if namespace:
+            # Steps inside an agent; the workflow node itself is reported below
+            continue
+
+        if in_tokens:
+            print()
+            in_tokens = False
+
+        elapsed = time.perf_counter() - started
+        if mode == "tasks":
+            # Task results are reported through "updates", which carry the state changes
+            if "input" in chunk:
+                print(f"[{elapsed:7.1f}s] {chunk['name']} started")
+            continue
+
+        for node_name, update in chunk.items():
+            print(f"[{elapsed:7.1f}s] {node_name} done")
+            result.update(update or {})
+
+            if node_name == "final_result_generation" and result["final_result"]:
+                file_name = f"service_info-{result['integration_name']}.md"
+                write_to_file(PROVISIONAL_NOTICE + result["final_result"], file_name)
+                print(f"Provisional system info for {product_name} written to file: {file_name}")
+
+    if metrics is not None:
+        print(f"[{product_name}]\n{metrics.format_table()}")
+
+    file_name = f"service_info-{result['integration_name']}.md"
+    write_to_file(result.get("final_result", ""), file_name)
+    print(f"System info for {product_name} written to file: {file_name}")
+    return file_name
+
+
+def run(product_name: str, show_metrics: bool = False, stream: bool = False,
+        checkpoint: bool = False, resume: bool = False, rerun_from: str | None = None):
+    """
+    Run the workflow.
+    """
+    graph = build_graph(checkpoint)
+    if stream:
+        stream_product(graph, product_name, show_metrics=show_metrics)
+    else:
+        run_product(graph, product_name, show_metrics=show_metrics,
+                    resume=resume, rerun_from=rerun_from)
+
+
+def read_products(path: str) -> list[str]:
+    """
+    Read product names, one per line, from a file or from stdin when path is "-".
+    Blank lines and lines starting with "#" are ignored.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
     else:
-        print("No result")
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def _run_batch_product(*args):
+    # Batch runs queue behind interactive ones for the shared LLM quota; the lane is
+    # set here because executor threads do not inherit the submitter's context
+    with llm_priority("batch"):
+        return run_product(*args)
+
+
+def run_batch(products: list[str], workers: int = 4, show_metrics: bool = False,
+              checkpoint: bool = False, resume: bool = False, rerun_from: str | None = None):
+    """
+    Run the workflow for many products in one process.
+
+    The graph is compiled once, and the LLM clients, browser pool, HTTP session and
+    caches are shared by every run. Each output file is written as soon as its
+    product finishes.
+    """
+    graph = build_graph(checkpoint)
+    started = time.perf_counter()
+
+    # Parse every manifest and docs file up front instead of once per product
+    packages_path = get_package_store().packages_path
+    if os.path.isdir(packages_path):
+        loaded = get_package_store().preload_all()
+        print(f"Preloaded {loaded} packages in {time.perf_counter() - started:.1f}s")
+    failures: dict[str, str] = {}
+    missing: list[str] = []
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="product") as executor:
+        futures = {
+            executor.submit(_run_batch_product, graph, product, show_metrics, resume, rerun_from): product
+            for product in products
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            product = futures[future]
+            try:
+                if future.result() is None:
+                    missing.append(product)
+            except Exception as e:  # pylint: disable=broad-except
+                failures[product] = f"{type(e).__name__}: {e}"
+                print(f"[{done}/{len(products)}] {product} failed: {failures[product]}")
+            else:
+                print(f"[{done}/{len(products)}] {product} done")
+
+    elapsed = time.perf_counter() - started
+    succeeded = len(products) - len(failures) - len(missing)
+    print(f"\nProcessed {len(products)} products in {elapsed:.1f}s "
+          f"({len(products) / elapsed * 60 if elapsed else 0:.1f} products/min, {workers} workers)")
+    print(f"Succeeded: {succeeded}, no result: {len(missing)}, failed: {len(failures)}")
+    for product, error in failures.items():
+        print(f"  - {product}: {error}")
+    for stats in rate_limiter_stats():
+        print(f"Rate limiter {stats['model']}: peak queue depth {stats['peak_queue_depth']}")
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("--product", type=str, required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--product", type=str)
+    source.add_argument("--products-file", type=str,
+                        help="File with one product per line, or - for stdin")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of products processed concurrently in batch mode")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Print per-node timing and resource usage")
+    parser.add_argument("--stream", action="store_true",
+                        help="Print progress and the generated text as it is produced")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Save a checkpoint after every node, keyed by product")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue each product's last checkpointed run from the node that failed")
+    parser.add_argument("--rerun-from", type=str, metavar="NODE",
+                        help="Re-execute NODE and everything downstream of it from the last checkpointed run")
+    parser.add_argument("--no-llm-cache", action="store_true",
+                        help="Neither read nor write the LLM response cache")
+    parser.add_argument("--refresh-llm-cache", action="store_true",
+                        help="Call the models again and overwrite cached responses")
     args = parser.parse_args()
 
-    run(args.product)
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        llm_cache.bypass = args.no_llm_cache
+        llm_cache.refresh = llm_cache.refresh or args.refresh_llm_cache
+
+    if args.stream and args.products_file:
+        parser.error("--stream can only be used with --product")
+    if args.stream and (args.resume or args.rerun_from):
+        parser.error("--stream cannot be combined with --resume or --rerun-from")
+    if args.resume and args.rerun_from:
+        parser.error("--resume and --rerun-from are mutually exclusive")
+    checkpoint = args.checkpoint or args.resume or bool(args.rerun_from)
+
+    configure_tracing()
+
+    if args.products_file:
+        run_batch(read_products(args.products_file), workers=args.workers, show_metrics=args.metrics,
+                  checkpoint=checkpoint, resume=args.resume, rerun_from=args.rerun_from)
+    else:
+        run(args.product, show_metrics=args.metrics, stream=args.stream,
+            checkpoint=checkpoint, resume=args.resume, rerun_from=args.rerun_from)
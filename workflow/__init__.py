@@ -1,11 +1,13 @@
 from .graph import WorkflowGraph, get_graph
 from .state import WorkflowState, default_state
+from .metrics import RunMetrics
 
 from .constants import DEBUG
 
 __all__ = [
     "WorkflowGraph",
     "WorkflowState",
+    "RunMetrics",
 
     "get_graph",
     "default_state",
@@ -0,0 +1,178 @@
+import time
+from dataclasses import dataclass
+from typing import Annotated, Any, Awaitable, Callable
+
+from langchain.agents.middleware import AgentMiddleware, AgentState, ModelRequest, ModelResponse, hook_config
+from langchain.agents.middleware.types import PrivateStateAttr
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+from langgraph.channels.untracked_value import UntrackedValue
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.types import Command
+from typing_extensions import NotRequired
+
+from .metrics import record
+
+_FINISH_INSTRUCTION = (
+    "The research budget for this task is used up ({reason}). Do not call any more tools. "
+    "Write your final answer now, in the requested format, using only the information gathered so far."
+)
+_TOOL_DENIED_MESSAGE = (
+    "Not run: the {reason} budget for this task is used up. "
+    "Finish with the information you already have."
+)
+_HARD_STOP_MESSAGE = "Stopped: the {reason} budget for this task is used up and no final answer was written."
+
+
+@dataclass(frozen=True)
+class AgentBudget:
+    """
+    Limits for one agent invocation. 0 means unlimited.
+    """
+    max_tool_calls: int = 0
+    max_fetches: int = 0
+    max_tokens: int = 0
+    deadline_seconds: float = 0
+
+
+class AgentBudgetState(AgentState):
+    budget_started_at: NotRequired[Annotated[float, UntrackedValue, PrivateStateAttr]]
+    # The limit reached before the current model call, which was then asked to finish
+    budget_exhausted: NotRequired[Annotated[str | None, UntrackedValue, PrivateStateAttr]]
+
+
+@dataclass
+class _Usage:
+    tool_calls: int = 0
+    fetches: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+
+
+class AgentBudgetMiddleware(AgentMiddleware):
+    """
+    Enforces an `AgentBudget` on every invocation of an agent.
+
+    Usage is derived from the messages of the invocation itself, so one instance can
+    serve concurrent runs. Once a limit is reached, tool calls are answered with a
+    "budget used up" message instead of running, and the next model call gets no
+    tools and an instruction to finish, so the agent still returns an answer built
+    from what it has gathered. If the model calls tools anyway, the calls are dropped
+    from its message and the run ends there.
+    """
+    state_schema = AgentBudgetState
+
+    def __init__(self, budget: AgentBudget, fetch_tool_names: tuple[str, ...] = ()) -> None:
+        super().__init__()
+        self.budget = budget
+        self.fetch_tool_names = fetch_tool_names
+
+    def before_agent(self, state: AgentBudgetState, runtime: Any) -> dict[str, Any] | None:
+        return {"budget_started_at": time.monotonic()}
+
+    def _usage(self, state: dict[str, Any], messages: list[AnyMessage]) -> _Usage:
+        usage = _Usage()
+        for message in messages:
+            if isinstance(message, ToolMessage):
+                usage.tool_calls += 1
+                usage.fetches += message.name in self.fetch_tool_names
+            elif isinstance(message, AIMessage) and message.usage_metadata:
+                usage.tokens += message.usage_metadata.get("total_tokens", 0)
+        usage.elapsed = time.monotonic() - state.get("budget_started_at", time.monotonic())
+        return usage
+
+    def _exhausted(self, usage: _Usage) -> str | None:
+        """
+        Returns the first limit that has been reached, or None.
+        """
+        budget = self.budget
+        if budget.deadline_seconds and usage.elapsed >= budget.deadline_seconds:
+            return "time"
+        if budget.max_tokens and usage.tokens >= budget.max_tokens:
+            return "token"
+        if budget.max_tool_calls and usage.tool_calls >= budget.max_tool_calls:
+            return "tool call"
+        return None
+
+    def before_model(self, state: AgentBudgetState, runtime: Any) -> dict[str, Any] | None:
+        reason = self._exhausted(self._usage(state, state["messages"]))
+        if reason is not None:
+            record(agent_budget_stops=1, **{f"agent_budget_{reason.replace(' ', '_')}_stops": 1})
+        return {"budget_exhausted": reason}
+
+    def _finish_request(self, request: ModelRequest) -> ModelRequest:
+        reason = request.state.get("budget_exhausted")
+        if reason is None:
+            return request
+        return request.override(
+            tools=[],
+            messages=[*request.messages, HumanMessage(content=_FINISH_INSTRUCTION.format(reason=reason))],
+        )
+
+    def wrap_model_call(self, request: ModelRequest,
+                        handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        return handler(self._finish_request(request))
+
+    async def awrap_model_call(self, request: ModelRequest,
+                               handler: Callable[[ModelRequest], Awaitable[ModelResponse]]) -> ModelResponse:
+        return await handler(self._finish_request(request))
+
+    @hook_config(can_jump_to=["end"])
+    def after_model(self, state: AgentBudgetState, runtime: Any) -> dict[str, Any] | None:
+        """
+        Ends the run when the model was asked to finish but called tools again, which
+        would otherwise loop through denied calls for as long as it keeps doing so.
+        """
+        reason = state.get("budget_exhausted")
+        message = state["messages"][-1]
+        if reason is None or not isinstance(message, AIMessage) or not message.tool_calls:
+            return None
+        record(agent_budget_hard_stops=1)
+        # Same id, so the message is replaced and the answer is whatever text it has
+        final = message.model_copy(update={
+            "tool_calls": [],
+            "invalid_tool_calls": [],
+            "content": message.content if message.text else _HARD_STOP_MESSAGE.format(reason=reason),
+        })
+        return {"messages": [final], "jump_to": "end"}
+
+    def _denied(self, request: ToolCallRequest) -> ToolMessage | None:
+        """
+        Returns the reply for a tool call that would exceed the budget, or None to run it.
+        Earlier calls from the same model turn count, as they may run concurrently.
+        """
+        messages = request.state["messages"]
+        usage = self._usage(request.state, messages)
+        pending = next((message.tool_calls for message in reversed(messages)
+                        if isinstance(message, AIMessage)), [])
+        call_id = request.tool_call["id"]
+        earlier = []
+        for tool_call in pending:
+            if tool_call["id"] == call_id:
+                break
+            earlier.append(tool_call)
+        usage.tool_calls += len(earlier)
+        usage.fetches += sum(tool_call["name"] in self.fetch_tool_names for tool_call in earlier)
+
+        reason = self._exhausted(usage)
+        is_fetch = request.tool_call["name"] in self.fetch_tool_names
+        if reason is None and is_fetch and self.budget.max_fetches \
+                and usage.fetches >= self.budget.max_fetches:
+            reason = "fetch"
+        if reason is None:
+            record(agent_tool_calls=1, agent_fetches=int(is_fetch))
+            return None
+
+        record(agent_tool_calls_denied=1)
+        return ToolMessage(content=_TOOL_DENIED_MESSAGE.format(reason=reason),
+                           tool_call_id=call_id, name=request.tool_call["name"])
+
+    def wrap_tool_call(self, request: ToolCallRequest,
+                       handler: Callable[[ToolCallRequest], ToolMessage | Command]) -> ToolMessage | Command:
+        denied = self._denied(request)
+        return denied if denied is not None else handler(request)
+
+    async def awrap_tool_call(self, request: ToolCallRequest,
+                              handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]]
+                              ) -> ToolMessage | Command:
+        denied = self._denied(request)
+        return denied if denied is not None else await handler(request)
@@ -1,7 +1,21 @@
-from langchain.agents import create_agent
+import threading
+from typing import Any
 
-from .constants import pro_llm, DEBUG, flash_llm
-from .tools import fetch_url_content_tool, web_search_tool, summarize_for_logging_setup
+from langchain_core.tools import BaseTool
+
+from .constants import (
+    AGENT_BUDGETS_ENABLED,
+    AGENT_DEADLINE_SECONDS,
+    AGENT_MAX_TOKENS,
+    AGENT_MAX_TOOL_CALLS,
+    DEBUG,
+    RESEARCH_AGENT_DEADLINE_SECONDS,
+    RESEARCH_AGENT_MAX_FETCHES,
+    RESEARCH_AGENT_MAX_TOKENS,
+    RESEARCH_AGENT_MAX_TOOL_CALLS,
+)
+from .models import get_llm
+from .tools import fetch_url_content_tool, get_web_search_tool, summarize_for_logging_setup
 from .prompts import (
     SETUP_INSTRUCTIONS_EXTERNAL_INFO_SYSTEM_PROMPT,
     SETUP_INSTRUCTIONS_CONTEXT_SYSTEM_PROMPT,
@@ -9,35 +23,92 @@ from .prompts import (
     SEARCH_RELEVANT_PACKAGE_SYSTEM_PROMPT,
 )
 
-setup_instructions_external_info_agent = create_agent(
-    model=pro_llm,
-    tools=[web_search_tool, fetch_url_content_tool, summarize_for_logging_setup],
-    name="setup_instructions_external_info_agent",
-    system_prompt=SETUP_INSTRUCTIONS_EXTERNAL_INFO_SYSTEM_PROMPT,
-    debug=DEBUG
-)
+# Limits per invocation, see `AgentBudget`; the vendor research agent loops the longest
+_RESEARCH_BUDGET = {
+    "max_tool_calls": RESEARCH_AGENT_MAX_TOOL_CALLS,
+    "max_fetches": RESEARCH_AGENT_MAX_FETCHES,
+    "max_tokens": RESEARCH_AGENT_MAX_TOKENS,
+    "deadline_seconds": RESEARCH_AGENT_DEADLINE_SECONDS,
+}
+_DEFAULT_BUDGET = {
+    "max_tool_calls": AGENT_MAX_TOOL_CALLS,
+    "max_tokens": AGENT_MAX_TOKENS,
+    "deadline_seconds": AGENT_DEADLINE_SECONDS,
+}
 
+_agents: dict[tuple[str, str], tuple[tuple[Any, ...], Any]] = {}
+_agents_lock = threading.Lock()
 
-search_relevant_package_agent = create_agent(
-    model=flash_llm,
-    tools=[web_search_tool],
-    debug=DEBUG,
-    name="search_relevant_package_agent",
-    system_prompt=SEARCH_RELEVANT_PACKAGE_SYSTEM_PROMPT,
-)
 
-setup_instructions_context_agent = create_agent(
-    model=pro_llm,
-    tools=[web_search_tool],
-    name="setup_instructions_context_agent",
-    system_prompt=SETUP_INSTRUCTIONS_CONTEXT_SYSTEM_PROMPT,
-    debug=DEBUG
-)
+def _middleware(budget: dict[str, float]) -> list[Any]:
+    if not AGENT_BUDGETS_ENABLED:
+        return []
+    # Deferred with the agent factory, which it builds on
+    from .agent_budget import AgentBudget, AgentBudgetMiddleware  # pylint: disable=import-outside-toplevel
 
-final_result_generation_agent = create_agent(
-    model=flash_llm,
-    tools=[web_search_tool],
-    name="final_result_generation_agent",
-    system_prompt=FINAL_RESULT_GENERATION_SYSTEM_PROMPT,
-    debug=DEBUG
-)
+    return [AgentBudgetMiddleware(AgentBudget(**budget), fetch_tool_names=(fetch_url_content_tool.name,))]
+
+
+def _get_agent(name: str, tier: str, tools: list[BaseTool], system_prompt: str,
+               budget: dict[str, float] = _DEFAULT_BUDGET) -> Any:
+    """
+    Returns the named agent on the model of the given tier, building it on first use and
+    again whenever its model or tools have been replaced through `set_models` or
+    `set_web_search_tool`. Each invocation is limited by `budget`.
+    """
+    model = get_llm(tier)
+    dependencies = (model, *tools)
+    with _agents_lock:
+        cached = _agents.get((name, tier))
+        if cached is None or any(a is not b for a, b in zip(cached[0], dependencies)):
+            # Deferred: importing the agent factory loads the prebuilt LangGraph agents
+            from langchain.agents import create_agent  # pylint: disable=import-outside-toplevel
+
+            agent = create_agent(
+                model=model,
+                tools=tools,
+                name=name,
+                system_prompt=system_prompt,
+                middleware=_middleware(budget),
+                debug=DEBUG
+            )
+            cached = (dependencies, agent)
+            _agents[(name, tier)] = cached
+        return cached[1]
+
+
+def get_setup_instructions_external_info_agent(tier: str = "pro") -> Any:
+    return _get_agent(
+        "setup_instructions_external_info_agent",
+        tier,
+        [get_web_search_tool(), fetch_url_content_tool, summarize_for_logging_setup],
+        SETUP_INSTRUCTIONS_EXTERNAL_INFO_SYSTEM_PROMPT,
+        _RESEARCH_BUDGET,
+    )
+
+
+def get_search_relevant_package_agent() -> Any:
+    return _get_agent(
+        "search_relevant_package_agent",
+        "flash",
+        [get_web_search_tool()],
+        SEARCH_RELEVANT_PACKAGE_SYSTEM_PROMPT,
+    )
+
+
+def get_setup_instructions_context_agent(tier: str = "pro") -> Any:
+    return _get_agent(
+        "setup_instructions_context_agent",
+        tier,
+        [get_web_search_tool()],
+        SETUP_INSTRUCTIONS_CONTEXT_SYSTEM_PROMPT,
+    )
+
+
+def get_final_result_generation_agent() -> Any:
+    return _get_agent(
+        "final_result_generation_agent",
+        "flash",
+        [get_web_search_tool()],
+        FINAL_RESULT_GENERATION_SYSTEM_PROMPT,
+    )
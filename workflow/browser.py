@@ -0,0 +1,223 @@
+import asyncio
+import atexit
+import contextvars
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Coroutine, TypeVar
+
+from .constants import (
+    BROWSER_MAX_CONTEXTS,
+    BROWSER_MAX_PAGES_PER_CONTEXT,
+    BROWSER_SETTLE_MS,
+    BROWSER_USER_AGENT,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
+T = TypeVar("T")
+
+
+class _PooledContext:
+    """
+    A browser context handed out to a single fetch at a time.
+    """
+
+    def __init__(self, context: "BrowserContext") -> None:
+        self.context = context
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """
+    A process-wide pool around a single long-lived Chromium instance.
+
+    Playwright objects are bound to the event loop that created them, so the pool
+    owns a dedicated background thread running an asyncio loop. Sync callers submit
+    coroutines to that loop with `run()`, which lets any number of worker threads
+    share one browser instead of launching their own.
+    """
+
+    def __init__(self,
+                 max_contexts: int = BROWSER_MAX_CONTEXTS,
+                 max_pages_per_context: int = BROWSER_MAX_PAGES_PER_CONTEXT,
+                 user_agent: str = BROWSER_USER_AGENT,
+                 headless: bool = True) -> None:
+        self.max_contexts = max_contexts
+        self.max_pages_per_context = max_pages_per_context
+        self.user_agent = user_agent
+        self.headless = headless
+
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+        # Only touched from the pool's event loop
+        self._playwright: "Playwright | None" = None
+        self._browser: "Browser | None" = None
+        self._browser_lock: asyncio.Lock | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._idle: list[_PooledContext] = []
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run_loop() -> None:
+                    asyncio.set_event_loop(loop)
+                    self._browser_lock = asyncio.Lock()
+                    self._slots = asyncio.Semaphore(self.max_contexts)
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(
+                    target=_run_loop, name="browser-pool", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """
+        Schedules a coroutine on the pool's event loop and returns a future for its result.
+
+        The coroutine runs in a copy of the caller's context, so context variables such
+        as the metrics of the node currently running stay visible on the pool's loop.
+        """
+        context = contextvars.copy_context()
+
+        async def _run_in_caller_context() -> T:
+            return await asyncio.get_running_loop().create_task(coro, context=context)
+
+        return asyncio.run_coroutine_threadsafe(_run_in_caller_context(), self._ensure_loop())
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Runs a coroutine on the pool's event loop and blocks until it completes.
+        """
+        return self.submit(coro).result()
+
+    async def _get_browser(self) -> "Browser":
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                # Drop contexts that belonged to a crashed browser
+                self._idle.clear()
+                if self._playwright is None:
+                    # Deferred so that importing the workflow does not load Playwright
+                    from playwright.async_api import async_playwright  # pylint: disable=import-outside-toplevel
+
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            return self._browser
+
+    async def _acquire_context(self) -> _PooledContext:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if pooled.context.browser and pooled.context.browser.is_connected():
+                    return pooled
+            browser = await self._get_browser()
+            context = await browser.new_context(user_agent=self.user_agent)
+            return _PooledContext(context)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _release_context(self, pooled: _PooledContext, healthy: bool) -> None:
+        try:
+            pooled.pages_served += 1
+            if healthy and pooled.pages_served < self.max_pages_per_context:
+                self._idle.append(pooled)
+            else:
+                # Recycle contexts that hit the page limit or saw a failure
+                try:
+                    await pooled.context.close()
+                except Exception:  # pylint: disable=broad-except
+                    pass
+        finally:
+            self._slots.release()
+
+    async def fetch_page(self, url: str, timeout: int = 30000, settle_ms: int = BROWSER_SETTLE_MS) -> tuple[int, str] | None:
+        """
+        Navigates to a URL in a pooled context. Must run on the pool's event loop.
+
+        Returns:
+            tuple[int, str] | None: The status code and rendered HTML, or None if no response was received.
+        """
+        pooled = await self._acquire_context()
+        healthy = False
+        page = None
+        try:
+            page = await pooled.context.new_page()
+            response = await page.goto(url, timeout=timeout, wait_until='networkidle')
+            if response is None:
+                healthy = True
+                return None
+
+            # Wait a bit for any dynamic content to load
+            if settle_ms:
+                await page.wait_for_timeout(settle_ms)
+
+            content_html = await page.content()
+            healthy = True
+            return response.status, content_html
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:  # pylint: disable=broad-except
+                    healthy = False
+            await self._release_context(pooled, healthy)
+
+    async def _shutdown(self) -> None:
+        for pooled in self._idle:
+            try:
+                await pooled.context.close()
+            except Exception:  # pylint: disable=broad-except
+                pass
+        self._idle.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:  # pylint: disable=broad-except
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self) -> None:
+        """
+        Closes the browser and stops the pool's event loop.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+_browser_pool: BrowserPool | None = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Returns the process-wide browser pool, creating it on first use.
+    """
+    global _browser_pool  # pylint: disable=global-statement
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool()
+            atexit.register(_browser_pool.close)
+        return _browser_pool
@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import AIMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from .metrics import record
+from .constants import (
+    FETCH_CACHE_DIR,
+    FETCH_CACHE_ENABLED,
+    FETCH_CACHE_MAX_MB,
+    FETCH_CACHE_TTL_SECONDS,
+    LLM_CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_REFRESH,
+    LLM_CACHE_TTL_SECONDS,
+    SEARCH_CACHE_DIR,
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_MAX_MB,
+    SEARCH_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass
+class CacheEntry:
+    """
+    A value read back from a `JsonDiskCache`.
+    """
+    value: Any
+    stored_at: float
+    ttl_seconds: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def expired(self) -> bool:
+        return self.age > self.ttl_seconds
+
+
+class JsonDiskCache:
+    """
+    A content-addressed on-disk cache of JSON values.
+
+    Each key is stored in its own file named after the SHA-256 of the key. Entries
+    older than `ttl_seconds` are still returned by `lookup()` (so callers can
+    revalidate them) but not by `get()`. Once the directory grows past `max_bytes`
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats: Counter[str] = Counter()
+
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """
+        Increments one of the cache's counters.
+        """
+        with self._lock:
+            self.stats[name] += amount
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """
+        Returns the entry stored under `key`, fresh or expired, or None if there is none.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            # Bump the mtime so eviction sees this entry as recently used
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return None
+
+        if cached.get("key") != key:
+            return None
+        return CacheEntry(cached["value"], cached["stored_at"], self.ttl_seconds)
+
+    def get(self, key: str) -> Any | None:
+        """
+        Returns the value stored under `key` if it has not expired.
+        """
+        entry = self.lookup(key)
+        if entry is None or entry.expired:
+            self.count("misses")
+            return None
+        self.count("hits")
+        return entry.value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a JSON-serializable value under `key`.
+        """
+        path = self._path(key)
+        data = json.dumps(
+            {"key": key, "stored_at": time.time(), "value": value})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self.count("stores")
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan()
+            else:
+                self._total_bytes += len(data.encode("utf-8")) - old_size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+        with self._lock:
+            self._total_bytes = 0
+
+    def _scan(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _evict(self) -> None:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Drop least recently used entries until we are comfortably under the cap
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self.stats["evictions"] += evicted
+
+
+_page_cache: JsonDiskCache | None = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> JsonDiskCache | None:
+    """
+    Returns the process-wide cache of fetched pages, or None if caching is disabled.
+    """
+    global _page_cache  # pylint: disable=global-statement
+    if not FETCH_CACHE_ENABLED:
+        return None
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = JsonDiskCache(
+                FETCH_CACHE_DIR,
+                ttl_seconds=FETCH_CACHE_TTL_SECONDS,
+                max_bytes=FETCH_CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _page_cache
+
+
+_search_cache: JsonDiskCache | None = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> JsonDiskCache | None:
+    """
+    Returns the process-wide cache of web search results, or None if caching is disabled.
+    """
+    global _search_cache  # pylint: disable=global-statement
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = JsonDiskCache(
+                SEARCH_CACHE_DIR,
+                ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+                max_bytes=SEARCH_CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _search_cache
+
+
+def _generation_to_dict(generation: Generation) -> dict[str, Any]:
+    if isinstance(generation, ChatGeneration):
+        return {"message": message_to_dict(generation.message),
+                "generation_info": generation.generation_info}
+    return {"text": generation.text, "generation_info": generation.generation_info}
+
+
+def _generation_from_dict(data: dict[str, Any]) -> Generation:
+    if "message" not in data:
+        return Generation(text=data["text"], generation_info=data["generation_info"])
+
+    message = messages_from_dict([data["message"]])[0]
+    if isinstance(message, AIMessage):
+        # Nothing was billed for this response; the metrics callback skips marked messages
+        message.usage_metadata = None
+        message.response_metadata["llm_cache_hit"] = True
+    return ChatGeneration(message=message, generation_info=data["generation_info"])
+
+
+class LlmResponseCache(BaseCache):
+    """
+    A LangChain LLM cache that keeps model responses in a `JsonDiskCache`.
+
+    LangChain passes the serialized messages as `prompt` and the model's parameters as
+    `llm_string`; the latter includes the model name, temperature and the schemas of
+    any tools bound for an agent, so a change to any of them is a miss.
+    `bypass` disables the cache, and `refresh` skips lookups but still stores new responses.
+    """
+
+    def __init__(self, store: JsonDiskCache, bypass: bool = False, refresh: bool = False) -> None:
+        self.store = store
+        self.bypass = bypass
+        self.refresh = refresh
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        # Prompts can be hundreds of kilobytes; store only their digest as the key
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Sequence[Generation] | None:
+        if self.bypass or self.refresh:
+            return None
+
+        value = self.store.get(self._key(prompt, llm_string))
+        if value is None:
+            record(llm_cache_misses=1)
+            return None
+        record(llm_cache_hits=1)
+        return [_generation_from_dict(item) for item in value]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self.bypass:
+            return
+        try:
+            self.store.set(self._key(prompt, llm_string),
+                           [_generation_to_dict(generation) for generation in return_val])
+        except (TypeError, ValueError) as e:
+            print(f"[LLM Cache] Response not cached: {e}")
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+
+_llm_cache: LlmResponseCache | None = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LlmResponseCache | None:
+    """
+    Returns the process-wide LLM response cache, or None if it is disabled.
+    """
+    global _llm_cache  # pylint: disable=global-statement
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LlmResponseCache(
+                JsonDiskCache(
+                    LLM_CACHE_DIR,
+                    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                    max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024,
+                ),
+                refresh=LLM_CACHE_REFRESH,
+            )
+        return _llm_cache
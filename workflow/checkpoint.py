@@ -0,0 +1,36 @@
+import os
+import re
+import sqlite3
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from .constants import CHECKPOINT_DB
+
+
+def thread_id_for(product_name: str) -> str:
+    """
+    Returns the checkpoint thread id for a product, so reruns of the same product share it.
+    """
+    return re.sub(r"[^a-z0-9]+", "-", product_name.lower()).strip("-") or "default"
+
+
+def get_sqlite_checkpointer(path: str = CHECKPOINT_DB) -> BaseCheckpointSaver:
+    """
+    Returns a checkpointer that persists graph state to a local SQLite database.
+
+    Requires the optional `langgraph-checkpoint-sqlite` package (`uv sync --extra checkpoint`).
+    """
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            "Checkpointing needs the optional langgraph-checkpoint-sqlite package. "
+            "Install it with: uv sync --extra checkpoint"
+        ) from e
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Batch mode runs several products on different threads against one saver
+    connection = sqlite3.connect(path, check_same_thread=False)
+    return SqliteSaver(connection)
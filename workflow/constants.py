@@ -1,5 +1,4 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,10 +7,133 @@ PRO_MODEL = os.getenv('GOOGLE_PRO_MODEL', "gemini-2.5-pro")
 FLASH_MODEL = os.getenv('GOOGLE_FLASH_MODEL', "gemini-2.5-flash")
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
-pro_llm = ChatGoogleGenerativeAI(model=PRO_MODEL, temperature=0)
-flash_llm = ChatGoogleGenerativeAI(model=FLASH_MODEL, temperature=0)
+# Shared headless browser used for fetching URL content
+BROWSER_MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "5"))
+BROWSER_MAX_PAGES_PER_CONTEXT = int(
+    os.getenv("BROWSER_MAX_PAGES_PER_CONTEXT", "20"))
+BROWSER_SETTLE_MS = int(os.getenv("BROWSER_SETTLE_MS", "2000"))
+BROWSER_USER_AGENT = os.getenv(
+    "BROWSER_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+)
 
-if os.getenv("INTEGRATION_ROOT_PATH"):
-    INTEGRATION_ROOT_PATH = os.getenv("INTEGRATION_ROOT_PATH")
-else:
-    raise ValueError("INTEGRATION_ROOT_PATH is not set")
+# URL fetch scheduling
+FETCH_TIMEOUT_MS = int(os.getenv("FETCH_TIMEOUT_MS", "30000"))
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "10"))
+FETCH_PER_HOST_CONCURRENCY = int(os.getenv("FETCH_PER_HOST_CONCURRENCY", "3"))
+FETCH_DEADLINE_SECONDS = float(os.getenv("FETCH_DEADLINE_SECONDS", "120"))
+
+# Plain HTTP fast path tried before rendering a page in the browser
+FETCH_HTTP_TIMEOUT_SECONDS = float(os.getenv("FETCH_HTTP_TIMEOUT_SECONDS", "15"))
+FETCH_MIN_TEXT_CHARS = int(os.getenv("FETCH_MIN_TEXT_CHARS", "200"))
+FETCH_SHELL_TEXT_CHARS = int(os.getenv("FETCH_SHELL_TEXT_CHARS", "1500"))
+FETCH_PROBE_TIMEOUT_SECONDS = float(
+    os.getenv("FETCH_PROBE_TIMEOUT_SECONDS", "10"))
+
+# On-disk cache of fetched pages. FETCH_OFFLINE serves only from the cache.
+FETCH_CACHE_ENABLED = os.getenv("FETCH_CACHE_ENABLED", "True").lower() == "true"
+FETCH_CACHE_DIR = os.getenv("FETCH_CACHE_DIR", os.path.join(".cache", "pages"))
+FETCH_CACHE_TTL_SECONDS = float(os.getenv("FETCH_CACHE_TTL_SECONDS", "86400"))
+FETCH_CACHE_MAX_MB = int(os.getenv("FETCH_CACHE_MAX_MB", "200"))
+FETCH_OFFLINE = os.getenv("FETCH_OFFLINE", "False").lower() == "true"
+
+# Number of URLs judged per LLM call during URL verification
+URL_EVAL_BATCH_SIZE = int(os.getenv("URL_EVAL_BATCH_SIZE", "10"))
+
+# How rejected URLs are removed: "remove" drops link-only lines, "unwrap" keeps link text
+URL_REMOVAL_MODE = os.getenv("URL_REMOVAL_MODE", "remove")
+URL_REMOVAL_USE_LLM = os.getenv("URL_REMOVAL_USE_LLM", "False").lower() == "true"
+
+# Run local-doc analysis and vendor web research concurrently instead of one after the other.
+# RESEARCH_RECONCILE adds a Flash pass that checks the web research against the local docs.
+PARALLEL_RESEARCH = os.getenv("PARALLEL_RESEARCH", "False").lower() == "true"
+RESEARCH_RECONCILE = os.getenv("RESEARCH_RECONCILE", "False").lower() == "true"
+
+# SQLite database used by `--resume` and `--rerun-from` to checkpoint runs per product
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.join(".cache", "checkpoints.sqlite"))
+
+# Package index used to match user input to an integration package
+PACKAGE_INDEX_PATH = os.getenv(
+    "PACKAGE_INDEX_PATH", os.path.join(".cache", "package_index.json"))
+PACKAGE_MATCH_THRESHOLD = float(os.getenv("PACKAGE_MATCH_THRESHOLD", "0.8"))
+PACKAGE_MATCH_TOP_K = int(os.getenv("PACKAGE_MATCH_TOP_K", "10"))
+
+# Parsed package manifests, cached by path, mtime and size
+PACKAGE_CACHE_ENABLED = os.getenv("PACKAGE_CACHE_ENABLED", "True").lower() == "true"
+PACKAGE_CACHE_DIR = os.getenv("PACKAGE_CACHE_DIR", os.path.join(".cache", "packages"))
+PACKAGE_PRELOAD_WORKERS = int(os.getenv("PACKAGE_PRELOAD_WORKERS", "16"))
+
+# Token budgets for the integration docs and manifest packed into each node's prompt.
+# CONTEXT_PACKING_ENABLED=false sends the full README and manifest as before.
+CONTEXT_PACKING_ENABLED = os.getenv("CONTEXT_PACKING_ENABLED", "True").lower() == "true"
+CONTEXT_BUDGET_SETUP_INSTRUCTIONS = int(os.getenv("CONTEXT_BUDGET_SETUP_INSTRUCTIONS", "6000"))
+CONTEXT_BUDGET_FINAL_RESULT = int(os.getenv("CONTEXT_BUDGET_FINAL_RESULT", "3000"))
+CONTEXT_BUDGET_MANIFEST = int(os.getenv("CONTEXT_BUDGET_MANIFEST", "1000"))
+
+# summarize_for_logging_setup splits pages into chunks of at most SUMMARY_CHUNK_CHARS
+# and summarizes only the SUMMARY_TOP_CHUNKS most relevant ones, concurrently
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "6000"))
+SUMMARY_TOP_CHUNKS = int(os.getenv("SUMMARY_TOP_CHUNKS", "3"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "3"))
+
+# Persistent cache of web search results, keyed by the normalized query
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "True").lower() == "true"
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", os.path.join(".cache", "search"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400"))
+SEARCH_CACHE_MAX_MB = int(os.getenv("SEARCH_CACHE_MAX_MB", "50"))
+
+# Client-side rate limits per model (requests and tokens per minute) and retries of
+# rate-limited calls. Defaults match Gemini's paid tier 1 quotas.
+LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "True").lower() == "true"
+PRO_RPM = int(os.getenv("PRO_RPM", "150"))
+PRO_TPM = int(os.getenv("PRO_TPM", "2000000"))
+FLASH_RPM = int(os.getenv("FLASH_RPM", "1000"))
+FLASH_TPM = int(os.getenv("FLASH_TPM", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "2"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "60"))
+
+# Model routing for the setup instructions agents: Flash is tried first and the node is
+# re-run on Pro when its answer fails validation. Larger or harder inputs go to Pro directly.
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "True").lower() == "true"
+ROUTING_FLASH_MAX_INPUT_TOKENS = int(os.getenv("ROUTING_FLASH_MAX_INPUT_TOKENS", "8000"))
+
+# Budgets per agent invocation. Once one is used up the agent gets no more tools and is
+# asked to finish with what it has. RESEARCH_AGENT_* apply to the vendor research agent,
+# AGENT_* to the others; 0 disables a limit.
+AGENT_BUDGETS_ENABLED = os.getenv("AGENT_BUDGETS_ENABLED", "True").lower() == "true"
+RESEARCH_AGENT_MAX_TOOL_CALLS = int(os.getenv("RESEARCH_AGENT_MAX_TOOL_CALLS", "10"))
+RESEARCH_AGENT_MAX_FETCHES = int(os.getenv("RESEARCH_AGENT_MAX_FETCHES", "4"))
+RESEARCH_AGENT_MAX_TOKENS = int(os.getenv("RESEARCH_AGENT_MAX_TOKENS", "150000"))
+RESEARCH_AGENT_DEADLINE_SECONDS = float(os.getenv("RESEARCH_AGENT_DEADLINE_SECONDS", "180"))
+AGENT_MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "4"))
+AGENT_MAX_TOKENS = int(os.getenv("AGENT_MAX_TOKENS", "60000"))
+AGENT_DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "90"))
+
+# Prices in USD per million tokens, used for the cost estimate in the run metrics
+PRO_INPUT_USD_PER_MTOK = float(os.getenv("PRO_INPUT_USD_PER_MTOK", "1.25"))
+PRO_OUTPUT_USD_PER_MTOK = float(os.getenv("PRO_OUTPUT_USD_PER_MTOK", "10"))
+FLASH_INPUT_USD_PER_MTOK = float(os.getenv("FLASH_INPUT_USD_PER_MTOK", "0.30"))
+FLASH_OUTPUT_USD_PER_MTOK = float(os.getenv("FLASH_OUTPUT_USD_PER_MTOK", "2.50"))
+
+# Persistent cache of LLM responses. LLM_CACHE_REFRESH skips lookups but still stores.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "200"))
+LLM_CACHE_REFRESH = os.getenv("LLM_CACHE_REFRESH", "False").lower() == "true"
+
+# Root of the integrations repository; only required once package data is read
+INTEGRATION_ROOT_PATH = os.getenv("INTEGRATION_ROOT_PATH")
+
+
+def get_integration_root_path() -> str:
+    """
+    Returns `INTEGRATION_ROOT_PATH`.
+
+    Raises:
+        ValueError: If it is not set.
+    """
+    if not INTEGRATION_ROOT_PATH:
+        raise ValueError("INTEGRATION_ROOT_PATH is not set")
+    return INTEGRATION_ROOT_PATH
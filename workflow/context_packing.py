@@ -0,0 +1,266 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+import yaml
+
+from .metrics import record
+
+# Rough ratio for English prose and markdown with Gemini's tokenizer; close enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Keywords that make a docs section worth keeping, per node
+SETUP_INSTRUCTIONS_FOCUS = (
+    "setup", "set up", "configur", "install", "requirement", "prerequisite",
+    "compatib", "syslog", "forward", "port", "protocol", "input", "log", "vendor",
+    "troubleshoot",
+)
+FINAL_RESULT_FOCUS = (
+    "overview", "introduction", "compatib", "setup", "set up", "configur", "requirement",
+    "troubleshoot", "limitation", "reference", "documentation", "vendor",
+)
+
+# Package spec template directives that render to field tables and sample events
+_TEMPLATE_DIRECTIVE_PATTERN = re.compile(
+    r"\{\{\s*(?:fields|event|inputDocs|generatedHeader)\b[^{}]*\}\}")
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+_BOILERPLATE_HEADING_PATTERN = re.compile(
+    r"exported fields|^fields$|ecs fields?|field reference|field mappings|example events?|sample events?",
+    re.IGNORECASE)
+_EXAMPLE_INTRO_PATTERN = re.compile(
+    r"example event|sample event|looks as follow", re.IGNORECASE)
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+# Sections are only cut short when at least this much of the budget is left
+_MIN_PARTIAL_TOKENS = 200
+
+# Manifest keys that say nothing about how the product is set up
+_MANIFEST_DROP_KEYS = {
+    "format_version", "owner", "icons", "screenshots", "source", "agent",
+    "elasticsearch", "deployment_modes", "privileges", "multiple", "show_user",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text.
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    """
+    Text packed into a prompt, with the token estimates before and after packing.
+    """
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.tokens, 0)
+
+
+@dataclass
+class DocSection:
+    """
+    A markdown heading and the lines up to the next heading. The preamble has level 0.
+    """
+    heading: str
+    level: int
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines).strip("\n")
+
+
+def split_sections(markdown: str) -> list[DocSection]:
+    """
+    Splits markdown into sections at each heading, ignoring `#` lines inside code blocks.
+    """
+    sections = [DocSection("", 0)]
+    in_fence = False
+    for line in markdown.split("\n"):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_PATTERN.match(line)
+        if match:
+            sections.append(DocSection(match.group(2), len(match.group(1))))
+        sections[-1].lines.append(line)
+    return [section for section in sections if section.text or section.level]
+
+
+def _drop_boilerplate_sections(sections: list[DocSection]) -> list[DocSection]:
+    kept = []
+    dropped_level = None
+    for section in sections:
+        if dropped_level is not None and section.level > dropped_level:
+            # Subsections of a dropped section go with it
+            continue
+        dropped_level = None
+        if section.level and _BOILERPLATE_HEADING_PATTERN.search(section.heading):
+            dropped_level = section.level
+            continue
+        kept.append(section)
+
+    # Drop headings left empty once their template directives are gone, innermost first
+    result: list[DocSection] = []
+    for section in reversed(kept):
+        has_body = section.text.strip() != section.lines[0].strip()
+        if has_body or not section.level or (result and result[-1].level > section.level):
+            result.append(section)
+    return result[::-1]
+
+
+def _is_field_table_header(line: str) -> bool:
+    cells = [cell.strip().lower() for cell in line.strip().strip("|").split("|")]
+    return "field" in cells and ("type" in cells or "description" in cells)
+
+
+def _drop_boilerplate_blocks(lines: list[str]) -> list[str]:
+    """
+    Drops field tables, example event code blocks and collapsed `<details>` blocks of either.
+    """
+    kept: list[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith("<details"):
+            end = next((j for j in range(i, len(lines)) if "</details>" in lines[j]), None)
+            block = "\n".join(lines[i:end + 1]) if end is not None else ""
+            if end is not None and re.search(r"fields|example|sample", block[:300], re.IGNORECASE):
+                i = end + 1
+                continue
+
+        if stripped.startswith("|") and _is_field_table_header(stripped):
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                i += 1
+            continue
+
+        if _FENCE_PATTERN.match(line):
+            previous = next((kept_line for kept_line in reversed(kept) if kept_line.strip()), "")
+            end = next((j for j in range(i + 1, len(lines)) if _FENCE_PATTERN.match(lines[j])), None)
+            if end is not None and _EXAMPLE_INTRO_PATTERN.search(previous):
+                # Drop the "An example event for `log` looks as following:" line too
+                while kept and not kept[-1].strip():
+                    kept.pop()
+                if kept:
+                    kept.pop()
+                i = end + 1
+                continue
+            if end is not None:
+                kept.extend(lines[i:end + 1])
+                i = end + 1
+                continue
+
+        kept.append(line)
+        i += 1
+    return kept
+
+
+def strip_boilerplate(markdown: str) -> str:
+    """
+    Removes the parts of an integration README that do not help describe the product
+    setup: field tables, exported fields sections, sample events and the
+    `{{fields}}` / `{{event}}` template directives.
+    """
+    markdown = _TEMPLATE_DIRECTIVE_PATTERN.sub("", markdown)
+    sections = _drop_boilerplate_sections(split_sections(markdown))
+    lines = _drop_boilerplate_blocks("\n\n".join(section.text for section in sections).split("\n"))
+    return _BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _relevance(section: DocSection, focus: tuple[str, ...]) -> int:
+    heading = section.heading.lower()
+    body = section.text.lower()
+    return sum(3 * (keyword in heading) + min(body.count(keyword), 5) for keyword in focus)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # Prefer ending on a paragraph or line break
+    for separator in ("\n\n", "\n"):
+        position = cut.rfind(separator)
+        if position > max_chars // 2:
+            cut = cut[:position]
+            break
+    if sum(1 for line in cut.split("\n") if _FENCE_PATTERN.match(line)) % 2:
+        # Close a code block that was cut in the middle
+        cut += "\n```"
+    return cut.rstrip() + "\n[...]"
+
+
+@lru_cache(maxsize=128)
+def pack_docs(docs: str, budget_tokens: int, focus: tuple[str, ...] = SETUP_INSTRUCTIONS_FOCUS) -> PackedContext:
+    """
+    Packs an integration README into a token budget.
+
+    Boilerplate is stripped first. If the rest is still over budget, the first section
+    (the title and introduction) is kept and the other sections are added by relevance to `focus` until the budget
+    is used up, then emitted in their original order.
+    """
+    original_tokens = estimate_tokens(docs)
+    stripped = strip_boilerplate(docs)
+    if estimate_tokens(stripped) <= budget_tokens:
+        return PackedContext(stripped, original_tokens, estimate_tokens(stripped))
+
+    sections = split_sections(stripped)
+    scores = [_relevance(section, focus) for section in sections]
+    order = sorted(range(len(sections)),
+                   key=lambda idx: (idx != 0, -scores[idx], idx))
+
+    chosen: dict[int, str] = {}
+    remaining = budget_tokens
+    for idx in order:
+        text = sections[idx].text
+        tokens = estimate_tokens(text)
+        if tokens <= remaining:
+            chosen[idx] = text
+            remaining -= tokens
+        elif remaining >= _MIN_PARTIAL_TOKENS and (scores[idx] or idx == 0):
+            chosen[idx] = _truncate(text, remaining)
+            remaining -= estimate_tokens(chosen[idx])
+
+    packed = "\n\n".join(chosen[idx] for idx in sorted(chosen))
+    return PackedContext(packed, original_tokens, estimate_tokens(packed))
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, dict):
+        compacted = {key: _compact(item) for key, item in value.items()
+                     if key not in _MANIFEST_DROP_KEYS}
+        return {key: item for key, item in compacted.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [item for item in (_compact(item) for item in value) if item not in (None, "", [], {})]
+    return value
+
+
+def pack_manifest(manifest: dict, budget_tokens: int) -> PackedContext:
+    """
+    Renders a package manifest as compact YAML, without ownership, icons and other
+    keys irrelevant to the product setup, truncated to a token budget.
+    """
+    original_tokens = estimate_tokens(str(manifest)) if manifest else 0
+    if not manifest:
+        return PackedContext("", original_tokens, 0)
+
+    text = yaml.safe_dump(_compact(manifest), sort_keys=False, allow_unicode=True, width=120).strip()
+    text = _truncate(text, budget_tokens)
+    return PackedContext(text, original_tokens, estimate_tokens(text))
+
+
+def record_packing(*packed: PackedContext) -> None:
+    """
+    Records the tokens sent and saved by packing for the node currently running.
+    """
+    record(context_tokens=sum(p.tokens for p in packed),
+           context_tokens_saved=sum(p.tokens_saved for p in packed))
@@ -1,19 +1,36 @@
-from typing import Literal
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Literal
 
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import START, END, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from .state import WorkflowState
+from .constants import PARALLEL_RESEARCH, RESEARCH_RECONCILE
+from .metrics import RunMetrics, MetricsCallbackHandler, track_node
 from .nodes import (
     find_relevant_packages_node,
+    afind_relevant_packages_node,
     get_package_info_node,
+    aget_package_info_node,
     search_relevant_package_node,
+    asearch_relevant_package_node,
     setup_instructions_context_node,
+    asetup_instructions_context_node,
     setup_instructions_external_info_node,
+    asetup_instructions_external_info_node,
     final_result_generation_node,
+    afinal_result_generation_node,
+    research_reconciliation_node,
+    aresearch_reconciliation_node,
     extract_urls_node,
+    url_probe_node,
+    aurl_probe_node,
     url_evaluation_node,
+    aurl_evaluation_node,
     url_removal_node,
+    aurl_removal_node,
 
     is_existing_integration,
 )
@@ -22,29 +39,78 @@ from .nodes import (
 class WorkflowGraph:
     """
     A graph for the workflow.
+
+    With `parallel_research`, the local-doc analysis and the vendor web research fan
+    out at the same time and join before `final_result_generation`; `reconcile` adds
+    a Flash pass between the join and the final result that aligns the two.
+
+    With a `checkpointer`, the state is saved after every node so an interrupted run
+    can be resumed with `resume` or partially re-executed with `rerun_from`.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, parallel_research: bool = PARALLEL_RESEARCH, reconcile: bool = RESEARCH_RECONCILE,
+                 checkpointer: BaseCheckpointSaver | None = None) -> None:
+        self.parallel_research = parallel_research
+        self.reconcile = reconcile
+        self.checkpointer = checkpointer
         self.compiled_graph: CompiledStateGraph = None
         self._build_graph()
 
+    @staticmethod
+    def _instrument(node_name: str, node: Callable[[WorkflowState], dict[str, Any]],
+                    anode: Callable[[WorkflowState], Awaitable[dict[str, Any]]] | None = None) -> RunnableLambda:
+        """
+        Wraps a node so it reports to the run's metrics when they are being collected.
+
+        `anode` is used when the graph runs with `ainvoke`/`astream`. Nodes without an
+        async version do only quick CPU work and are called inline on the event loop.
+        """
+        def _instrumented_node(state: WorkflowState, config: RunnableConfig) -> dict[str, Any]:
+            metrics: RunMetrics | None = config.get(
+                "configurable", {}).get("run_metrics")
+            if metrics is None:
+                return node(state)
+            with track_node(metrics, node_name):
+                return node(state)
+
+        async def _ainstrumented_node(state: WorkflowState, config: RunnableConfig) -> dict[str, Any]:
+            metrics: RunMetrics | None = config.get(
+                "configurable", {}).get("run_metrics")
+            if metrics is None:
+                return await anode(state) if anode else node(state)
+            with track_node(metrics, node_name):
+                return await anode(state) if anode else node(state)
+
+        return RunnableLambda(_instrumented_node, afunc=_ainstrumented_node, name=node_name)
+
+    def _add_node(self, graph: StateGraph, node_name: str, node: Callable[[WorkflowState], dict[str, Any]],
+                  anode: Callable[[WorkflowState], Awaitable[dict[str, Any]]] | None = None) -> None:
+        graph.add_node(node_name, self._instrument(node_name, node, anode))
+
     def _build_graph(self) -> CompiledStateGraph:
         graph: StateGraph[WorkflowState] = StateGraph(WorkflowState)
 
         # Adding nodes to the graph
-        graph.add_node("find_relevant_packages", find_relevant_packages_node)
-        graph.add_node("get_package_info", get_package_info_node)
-        graph.add_node("setup_instructions_external_info",
-                       setup_instructions_external_info_node)
-        graph.add_node("setup_instructions_context",
-                       setup_instructions_context_node)
-        graph.add_node("search_relevant_package", search_relevant_package_node)
-        graph.add_node("final_result_generation", final_result_generation_node)
+        self._add_node(graph, "find_relevant_packages",
+                       find_relevant_packages_node, afind_relevant_packages_node)
+        self._add_node(graph, "get_package_info",
+                       get_package_info_node, aget_package_info_node)
+        self._add_node(graph, "setup_instructions_external_info",
+                       setup_instructions_external_info_node, asetup_instructions_external_info_node)
+        self._add_node(graph, "setup_instructions_context",
+                       setup_instructions_context_node, asetup_instructions_context_node)
+        self._add_node(graph, "search_relevant_package",
+                       search_relevant_package_node, asearch_relevant_package_node)
+        self._add_node(graph, "final_result_generation",
+                       final_result_generation_node, afinal_result_generation_node)
 
         # New parallel URL verification nodes
-        graph.add_node("extract_urls", extract_urls_node)
-        graph.add_node("url_evaluation", url_evaluation_node)
-        graph.add_node("url_removal", url_removal_node)
+        self._add_node(graph, "extract_urls", extract_urls_node)
+        self._add_node(graph, "url_probe", url_probe_node, aurl_probe_node)
+        self._add_node(graph, "url_evaluation",
+                       url_evaluation_node, aurl_evaluation_node)
+        self._add_node(graph, "url_removal",
+                       url_removal_node, aurl_removal_node)
 
         # Adding edges between nodes
         graph.add_edge(START, "find_relevant_packages")
@@ -52,21 +118,48 @@ class WorkflowGraph:
             "yes": "get_package_info",
             "no": "search_relevant_package"
         })
-        graph.add_edge("search_relevant_package",
-                       "setup_instructions_external_info")
-        graph.add_edge("get_package_info", "setup_instructions_context")
-        graph.add_edge("setup_instructions_context",
-                       "setup_instructions_external_info")
-        graph.add_edge("setup_instructions_external_info",
-                       "final_result_generation")
+        if self.parallel_research:
+            self._add_parallel_research_edges(graph)
+        else:
+            graph.add_edge("search_relevant_package",
+                           "setup_instructions_external_info")
+            graph.add_edge("get_package_info", "setup_instructions_context")
+            graph.add_edge("setup_instructions_context",
+                           "setup_instructions_external_info")
+            graph.add_edge("setup_instructions_external_info",
+                           "final_result_generation")
 
         # Wire the new parallel URL verification pipeline
         graph.add_edge("final_result_generation", "extract_urls")
-        graph.add_edge("extract_urls", "url_evaluation")
+        graph.add_edge("extract_urls", "url_probe")
+        graph.add_edge("url_probe", "url_evaluation")
         graph.add_edge("url_evaluation", "url_removal")
         graph.add_edge("url_removal", END)
 
-        self.compiled_graph = graph.compile()
+        self.compiled_graph = graph.compile(checkpointer=self.checkpointer)
+
+    def _add_parallel_research_edges(self, graph: StateGraph) -> None:
+        """
+        Fans out to both research nodes and joins them before the final result.
+
+        The branches write disjoint state keys, so their updates merge without conflicts.
+        New integrations have no local docs, so the context node returns immediately for
+        them, but it still runs so the join fires on both paths.
+        """
+        research_nodes = ["setup_instructions_context",
+                          "setup_instructions_external_info"]
+        for source in ("get_package_info", "search_relevant_package"):
+            for research_node in research_nodes:
+                graph.add_edge(source, research_node)
+
+        if self.reconcile:
+            self._add_node(graph, "research_reconciliation",
+                           research_reconciliation_node, aresearch_reconciliation_node)
+            graph.add_edge(research_nodes, "research_reconciliation")
+            graph.add_edge("research_reconciliation",
+                           "final_result_generation")
+        else:
+            graph.add_edge(research_nodes, "final_result_generation")
 
     def draw_graph(self, graph_type: Literal["ascii", "mermaid"] = "ascii") -> None:
         """
@@ -78,15 +171,188 @@ class WorkflowGraph:
             case "mermaid":
                 print(self.compiled_graph.get_graph().draw_mermaid())
 
-    def run(self, state: WorkflowState) -> WorkflowState:
+    def run(self, state: WorkflowState, thread_id: str | None = None) -> WorkflowState:
         """
         Runs the workflow.
+
+        With a checkpointer, `thread_id` is required and names the run's checkpoints;
+        any earlier checkpoints of that thread are discarded first.
+        """
+        self._start_thread(thread_id)
+        return self._invoke(state, self._config(thread_id=thread_id))
+
+    def run_with_metrics(self, state: WorkflowState, thread_id: str | None = None) -> tuple[WorkflowState, RunMetrics]:
+        """
+        Runs the workflow and records per-node wall time, CPU time, LLM calls,
+        token usage, fetches, cache hits and bytes downloaded.
+        """
+        self._start_thread(thread_id)
+        metrics = RunMetrics()
+        result = self._invoke(state, self._config(
+            metrics, thread_id=thread_id), metrics)
+        return result, metrics
+
+    def has_checkpoint(self, thread_id: str) -> bool:
+        """
+        Returns whether a checkpointed run exists for `thread_id`.
+        """
+        if self.checkpointer is None:
+            return False
+        snapshot = self.compiled_graph.get_state(
+            {"configurable": {"thread_id": thread_id}})
+        return bool(snapshot.values)
+
+    def resume(self, thread_id: str, metrics: RunMetrics | None = None) -> WorkflowState:
+        """
+        Continues a checkpointed run from the last node that completed.
+
+        Nodes that finished before the failure are not run again. A run that already
+        finished returns its final state without running anything.
         """
-        return self.compiled_graph.invoke(state)
+        self._require_checkpointer()
+        snapshot = self.compiled_graph.get_state(
+            {"configurable": {"thread_id": thread_id}})
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for thread '{thread_id}'")
+        if not snapshot.next:
+            return snapshot.values
+        return self._invoke(None, self._config(metrics, thread_id=thread_id), metrics)
+
+    def rerun_from(self, thread_id: str, node_name: str, values: dict[str, Any] | None = None,
+                   metrics: RunMetrics | None = None, as_node: str | None = None) -> WorkflowState:
+        """
+        Re-executes `node_name` and everything downstream of it in a checkpointed run.
+
+        Upstream results are taken from the checkpoint taken just before the node last
+        ran. `values` overrides state keys first, applied through the state reducers
+        as if the preceding node had written them. When several nodes ran in parallel
+        just before it, pass the one that should write `values` as `as_node`.
+        """
+        self._require_checkpointer()
+        history = list(self.compiled_graph.get_state_history(
+            {"configurable": {"thread_id": thread_id}}))
+        # History is newest first; the entry after a snapshot is the one before it
+        for idx, snapshot in enumerate(history):
+            if node_name in snapshot.next:
+                break
+        else:
+            raise ValueError(
+                f"Node '{node_name}' has not run in thread '{thread_id}'")
+
+        checkpoint_config = snapshot.config
+        if values:
+            previous = history[idx + 1] if idx + 1 < len(history) else None
+            if as_node is None and previous and previous.next:
+                if len(previous.next) > 1:
+                    raise ValueError(
+                        f"Nodes {', '.join(previous.next)} ran in parallel before '{node_name}'; "
+                        "pass as_node to say which of them writes the values")
+                as_node = previous.next[0]
+            checkpoint_config = self.compiled_graph.update_state(
+                snapshot.config, values, as_node=as_node)
+
+        return self._invoke(None, self._config(metrics, base=checkpoint_config), metrics)
+
+    def stream(self, state: WorkflowState, stream_mode: str | list[str] = "updates",
+               metrics: RunMetrics | None = None, thread_id: str | None = None) -> Iterator[Any]:
+        """
+        Runs the workflow, yielding each node's state update as it finishes.
+
+        Chunks from inside the agents are included, so each chunk is a `(namespace, data)`
+        pair, or `(namespace, mode, data)` with several modes such as
+        `["updates", "messages"]`. The namespace is empty for the workflow's own nodes;
+        `metrics.stream_node_name` maps it to the node an agent chunk belongs to.
+        "messages" chunks carry LLM tokens as they are generated. Pass `metrics` to
+        collect the same numbers as `run_with_metrics`.
+        """
+        self._start_thread(thread_id)
+        config = self._config(metrics, thread_id=thread_id)
+        started = time.perf_counter()
+        try:
+            # The agents are subgraphs, whose LLM tokens are only streamed with subgraphs=True
+            yield from self.compiled_graph.stream(state, config=config, stream_mode=stream_mode,
+                                                  subgraphs=True)
+        finally:
+            if metrics is not None:
+                metrics.wall_s = time.perf_counter() - started
+
+    async def arun(self, state: WorkflowState, thread_id: str | None = None) -> WorkflowState:
+        """
+        Runs the workflow on the current event loop.
+
+        LLM calls, agents and page fetches are awaited rather than blocking a thread, so
+        many runs can share one event loop, e.g. with `asyncio.gather`.
+        """
+        self._start_thread(thread_id)
+        return await self.compiled_graph.ainvoke(state, config=self._config(thread_id=thread_id))
+
+    async def arun_with_metrics(self, state: WorkflowState,
+                                thread_id: str | None = None) -> tuple[WorkflowState, RunMetrics]:
+        """
+        Async version of `run_with_metrics`. CPU time is process-wide, so it also counts
+        other runs sharing the event loop.
+        """
+        self._start_thread(thread_id)
+        metrics = RunMetrics()
+        started = time.perf_counter()
+        try:
+            result = await self.compiled_graph.ainvoke(
+                state, config=self._config(metrics, thread_id=thread_id))
+        finally:
+            metrics.wall_s = time.perf_counter() - started
+        return result, metrics
+
+    async def astream(self, state: WorkflowState, stream_mode: str | list[str] = "updates",
+                      metrics: RunMetrics | None = None, thread_id: str | None = None) -> AsyncIterator[Any]:
+        """
+        Async version of `stream`.
+        """
+        self._start_thread(thread_id)
+        config = self._config(metrics, thread_id=thread_id)
+        started = time.perf_counter()
+        try:
+            async for chunk in self.compiled_graph.astream(state, config=config, stream_mode=stream_mode,
+                                                              subgraphs=True):
+                yield chunk
+        finally:
+            if metrics is not None:
+                metrics.wall_s = time.perf_counter() - started
+
+    def _invoke(self, graph_input: WorkflowState | None, config: RunnableConfig,
+                metrics: RunMetrics | None = None) -> WorkflowState:
+        started = time.perf_counter()
+        try:
+            return self.compiled_graph.invoke(graph_input, config=config)
+        finally:
+            if metrics is not None:
+                metrics.wall_s = time.perf_counter() - started
+
+    @staticmethod
+    def _config(metrics: RunMetrics | None = None, thread_id: str | None = None,
+                base: RunnableConfig | None = None) -> RunnableConfig:
+        configurable = dict((base or {}).get("configurable", {}))
+        config: RunnableConfig = {"configurable": configurable}
+        if thread_id is not None:
+            configurable["thread_id"] = thread_id
+        if metrics is not None:
+            configurable["run_metrics"] = metrics
+            config["callbacks"] = [MetricsCallbackHandler(metrics)]
+        return config
+
+    def _start_thread(self, thread_id: str | None) -> None:
+        # A fresh run must not inherit the previous run's messages or URL probes
+        if self.checkpointer is not None and thread_id is not None:
+            self.checkpointer.delete_thread(thread_id)
+
+    def _require_checkpointer(self) -> None:
+        if self.checkpointer is None:
+            raise ValueError(
+                "Resuming a run needs a WorkflowGraph built with a checkpointer")
 
 
-def get_graph() -> WorkflowGraph:
+def get_graph(parallel_research: bool = PARALLEL_RESEARCH, reconcile: bool = RESEARCH_RECONCILE,
+              checkpointer: BaseCheckpointSaver | None = None) -> WorkflowGraph:
     """
     Returns the graph for the workflow.
     """
-    return WorkflowGraph()
+    return WorkflowGraph(parallel_research=parallel_research, reconcile=reconcile, checkpointer=checkpointer)
@@ -0,0 +1,34 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .constants import BROWSER_USER_AGENT, FETCH_CONCURRENCY
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session.
+
+    The session keeps connections alive between requests and is sized so every
+    concurrent fetch can hold its own pooled connection.
+    """
+    global _session  # pylint: disable=global-statement
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=FETCH_CONCURRENCY,
+                                  pool_maxsize=FETCH_CONCURRENCY)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": BROWSER_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Encoding": "gzip, deflate",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+            _session = session
+        return _session
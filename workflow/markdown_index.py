@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Markdown links [text](url) or bare URLs, matched in a single pass. Links come
+# first so a URL inside a link is never reported a second time as a bare URL.
+# Bare URLs stop at ")" and ">", which close "(https://...)" and "<https://...>".
+LINK_OR_URL_PATTERN = re.compile(
+    r'\[([^\]]+)\]\(([^)]+)\)|(https?://[^\s)>]+)')
+
+SECTION_TYPE_KEYWORDS = {
+    "product_info": ['intro', 'overview', 'about', 'service info', 'common use', 'compatibility'],
+    "setup": ['setup', 'configuration', 'install', 'set up', 'vendor set up', 'kibana set up'],
+    "documentation": ['documentation', 'reference', 'resources', 'documentation sites'],
+    "troubleshooting": ['troubleshoot', 'error', 'issue'],
+}
+
+
+def classify_section(heading: str) -> str:
+    """
+    Map a section heading to the section type used by the URL validation rules.
+    """
+    heading_lower = heading.lower()
+    for section_type, keywords in SECTION_TYPE_KEYWORDS.items():
+        if any(keyword in heading_lower for keyword in keywords):
+            return section_type
+    return "other"
+
+
+@dataclass
+class UrlOccurrence:
+    """
+    A single URL found in the markdown content.
+    """
+    url: str
+    line: int
+    start: int
+    end: int
+    link_text: str | None
+    section: str
+    section_type: str
+
+
+@dataclass
+class MarkdownUrlIndex:
+    """
+    Every URL in a markdown document, with its position and enclosing section.
+
+    Built in one pass over the document, so extracting URLs, looking up their
+    context and rewriting them all cost O(n) in the document size regardless of
+    how many links it contains.
+    """
+    markdown_content: str
+    context_lines: int = 5
+    lines: list[str] = field(init=False)
+    occurrences: list[UrlOccurrence] = field(init=False)
+    _first: dict[str, UrlOccurrence] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.lines = self.markdown_content.split('\n')
+        self.occurrences = []
+        self._first = {}
+
+        current_section = "Unknown"
+        section_type = "other"
+        for line_idx, line in enumerate(self.lines):
+            stripped = line.strip()
+            if stripped.startswith('#'):
+                current_section = stripped.lstrip('#').strip()
+                section_type = classify_section(current_section)
+
+            if 'http' not in line:
+                continue
+
+            for match in LINK_OR_URL_PATTERN.finditer(line):
+                link_text, link_url, bare_url = match.groups()
+                if link_url is not None:
+                    url = link_url.strip()
+                    if not url.startswith('http'):
+                        continue
+                else:
+                    url = bare_url.strip()
+
+                occurrence = UrlOccurrence(
+                    url=url,
+                    line=line_idx,
+                    start=match.start(),
+                    end=match.end(),
+                    link_text=link_text,
+                    section=current_section,
+                    section_type=section_type,
+                )
+                self.occurrences.append(occurrence)
+                self._first.setdefault(url, occurrence)
+
+    @property
+    def urls(self) -> list[str]:
+        """
+        Unique URLs in order of first appearance.
+        """
+        return list(self._first)
+
+    def context(self, url: str) -> dict[str, str]:
+        """
+        Returns the section, section type and surrounding lines of the first occurrence of a URL.
+        """
+        occurrence = self._first.get(url)
+        if occurrence is None:
+            return {
+                "url": url,
+                "section": "Unknown",
+                "section_type": "other",
+                "context": "URL not found in content"
+            }
+
+        context_start = max(0, occurrence.line - self.context_lines)
+        context_end = min(len(self.lines),
+                          occurrence.line + self.context_lines + 1)
+        return {
+            "url": url,
+            "section": occurrence.section,
+            "section_type": occurrence.section_type,
+            "context": '\n'.join(self.lines[context_start:context_end])
+        }
+
+    def occurrences_by_line(self, urls: set[str] | None = None) -> dict[int, list[UrlOccurrence]]:
+        """
+        Groups occurrences by line number, optionally keeping only the given URLs.
+        """
+        by_line: dict[int, list[UrlOccurrence]] = {}
+        for occurrence in self.occurrences:
+            if urls is None or occurrence.url in urls:
+                by_line.setdefault(occurrence.line, []).append(occurrence)
+        return by_line
+
+
+@lru_cache(maxsize=8)
+def get_markdown_url_index(markdown_content: str) -> MarkdownUrlIndex:
+    """
+    Returns the URL index for a markdown document, reusing it across pipeline stages.
+    """
+    return MarkdownUrlIndex(markdown_content)
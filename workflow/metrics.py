@@ -0,0 +1,309 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+from typing import Any, Iterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .constants import (
+    FLASH_INPUT_USD_PER_MTOK,
+    FLASH_MODEL,
+    FLASH_OUTPUT_USD_PER_MTOK,
+    PRO_INPUT_USD_PER_MTOK,
+    PRO_MODEL,
+    PRO_OUTPUT_USD_PER_MTOK,
+)
+
+# (input, output) USD per million tokens by model name
+_PRICES = {
+    FLASH_MODEL: (FLASH_INPUT_USD_PER_MTOK, FLASH_OUTPUT_USD_PER_MTOK),
+    PRO_MODEL: (PRO_INPUT_USD_PER_MTOK, PRO_OUTPUT_USD_PER_MTOK),
+}
+
+
+def llm_cost(model_name: str | None, input_tokens: int, output_tokens: int) -> float:
+    """
+    Estimates the cost in USD of a model call; 0 for models without a configured price.
+    """
+    input_price, output_price = _PRICES.get((model_name or "").removeprefix("models/"), (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class NodeMetrics:
+    """
+    Resource usage of a single graph node during one run.
+    """
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    fetches: int = 0
+    cache_hits: int = 0
+    bytes_downloaded: int = 0
+    # Free-form counters for anything without a dedicated field
+    counters: Counter[str] = field(default_factory=Counter)
+
+    def add(self, other: "NodeMetrics") -> None:
+        for f in fields(self):
+            if f.name == "counters":
+                self.counters.update(other.counters)
+            else:
+                setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {f.name: getattr(self, f.name)
+                for f in fields(self) if f.name != "counters"}
+        data["wall_s"] = round(self.wall_s, 4)
+        data["cpu_s"] = round(self.cpu_s, 4)
+        data.update(self.counters)
+        return data
+
+
+@dataclass
+class RunMetrics:
+    """
+    Per-node resource usage collected during one `WorkflowGraph` run.
+    """
+    nodes: dict[str, NodeMetrics] = field(default_factory=dict)
+    wall_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def node(self, name: str) -> NodeMetrics:
+        with self._lock:
+            return self.nodes.setdefault(name, NodeMetrics())
+
+    def update(self, name: str, **amounts: float) -> None:
+        """
+        Adds to a node's fields; unknown names go to its free-form counters.
+        """
+        node = self.node(name)
+        with self._lock:
+            for key, amount in amounts.items():
+                if key != "counters" and hasattr(node, key):
+                    setattr(node, key, getattr(node, key) + amount)
+                else:
+                    node.counters[key] += amount
+
+    def totals(self) -> NodeMetrics:
+        total = NodeMetrics()
+        with self._lock:
+            for node in self.nodes.values():
+                total.add(node)
+        total.wall_s = self.wall_s or total.wall_s
+        return total
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "nodes": {name: node.to_dict() for name, node in self.nodes.items()},
+            "totals": self.totals().to_dict(),
+        }
+
+    def format_table(self) -> str:
+        """
+        Renders the metrics as a fixed-width table, one row per node.
+        """
+        columns = [("wall_s", "wall s"), ("cpu_s", "cpu s"), ("llm_calls", "llm"),
+                   ("prompt_tokens", "prompt tok"), ("completion_tokens", "compl tok"),
+                   ("fetches", "fetches"), ("cache_hits", "cache hits"),
+                   ("bytes_downloaded", "KB down")]
+
+        def _cell(key: str, value: float) -> str:
+            if key in ("wall_s", "cpu_s"):
+                return f"{value:.2f}"
+            if key == "bytes_downloaded":
+                return f"{value / 1024:.1f}"
+            return str(int(value))
+
+        header = f"{'node':<34}" + \
+            "".join(f"{title:>12}" for _, title in columns)
+        lines = [header, "-" * len(header)]
+        totals = self.totals()
+        rows = list(self.nodes.items()) + [("TOTAL", totals)]
+        for name, node in rows:
+            if name == "TOTAL":
+                lines.append("-" * len(header))
+            lines.append(f"{name:<34}" + "".join(
+                f"{_cell(key, getattr(node, key)):>12}" for key, _ in columns))
+
+        summary = []
+        hits = totals.counters.get("llm_cache_hits", 0)
+        lookups = hits + totals.counters.get("llm_cache_misses", 0)
+        if lookups:
+            summary.append(f"LLM cache: {int(hits)}/{int(lookups)} hits ({hits / lookups:.0%})")
+
+        saved = totals.counters.get("context_tokens_saved", 0)
+        if saved:
+            original = saved + totals.counters.get("context_tokens", 0)
+            summary.append(f"Context packing: {int(saved)}/{int(original)} tokens saved ({saved / original:.0%})")
+        searches = totals.counters.get("web_searches", 0)
+        if searches:
+            summary.append(f"Web search: {int(totals.counters.get('web_search_calls', 0))}/{int(searches)} "
+                           f"queries sent ({int(totals.counters.get('web_search_cache_hits', 0))} cached, "
+                           f"{int(totals.counters.get('web_search_coalesced', 0))} coalesced)")
+        waits = totals.counters.get("llm_rate_limit_waits", 0)
+        retries = totals.counters.get("llm_rate_limit_retries", 0)
+        if waits or retries:
+            summary.append(f"LLM rate limit: {int(waits)} calls waited "
+                           f"{totals.counters.get('llm_rate_limit_wait_s', 0):.1f}s, {int(retries)} retries")
+        routed_flash = totals.counters.get("routed_flash", 0)
+        if routed_flash or totals.counters.get("routed_pro", 0):
+            summary.append(f"Model routing: {int(routed_flash)} on Flash, "
+                           f"{int(totals.counters.get('routed_pro', 0))} on Pro "
+                           f"({int(totals.counters.get('routed_escalations', 0))} escalated from Flash)")
+        tool_calls = totals.counters.get("agent_tool_calls", 0)
+        if tool_calls or totals.counters.get("agent_tool_calls_denied", 0) \
+                or totals.counters.get("agent_budget_stops", 0):
+            summary.append(f"Agent budgets: {int(tool_calls)} tool calls "
+                           f"({int(totals.counters.get('agent_fetches', 0))} fetches), "
+                           f"{int(totals.counters.get('agent_tool_calls_denied', 0))} denied, "
+                           f"{int(totals.counters.get('agent_budget_stops', 0))} early finishes "
+                           f"({int(totals.counters.get('agent_budget_hard_stops', 0))} hard stops)")
+        cost = totals.counters.get("llm_cost_usd", 0)
+        if cost:
+            summary.append(f"LLM cost: ${cost:.4f}")
+        if summary:
+            lines.append("")
+            lines.extend(summary)
+
+        extras = [(name, node.counters)
+                  for name, node in self.nodes.items() if node.counters]
+        if extras:
+            lines.append("")
+            for name, counters in extras:
+                details = ", ".join(f"{key}={value:g}" for key,
+                                    value in sorted(counters.items()))
+                lines.append(f"{name}: {details}")
+        return "\n".join(lines)
+
+
+_current_node: ContextVar[tuple[RunMetrics, str] | None] = ContextVar(
+    "workflow_current_node", default=None)
+
+
+@contextmanager
+def track_node(metrics: RunMetrics, node_name: str) -> Iterator[None]:
+    """
+    Times a node and attributes everything recorded while it runs to it.
+    """
+    token = _current_node.set((metrics, node_name))
+    wall_started = time.perf_counter()
+    # process_time() covers every thread, including fetch and batch workers
+    cpu_started = time.process_time()
+    try:
+        yield
+    finally:
+        metrics.update(node_name,
+                       wall_s=time.perf_counter() - wall_started,
+                       cpu_s=time.process_time() - cpu_started)
+        _current_node.reset(token)
+
+
+def record(**amounts: float) -> None:
+    """
+    Adds to the metrics of the node currently running, if metrics are being collected.
+    """
+    current = _current_node.get()
+    if current is None:
+        return
+    metrics, node_name = current
+    metrics.update(node_name, **amounts)
+
+
+def record_fetch(bytes_downloaded: int = 0, cache_hit: bool = False) -> None:
+    """
+    Records a page fetch for the node currently running.
+    """
+    record(fetches=1, cache_hits=int(cache_hit),
+           bytes_downloaded=bytes_downloaded)
+
+
+def graph_node_name(metadata: dict[str, Any] | None) -> str | None:
+    """
+    Returns the top-level graph node a callback event belongs to.
+
+    Agents are graphs themselves, so inside them `langgraph_node` names the agent's own
+    node ("model", "tools"); the first segment of the checkpoint namespace is the node
+    of the outer workflow graph.
+    """
+    metadata = metadata or {}
+    checkpoint_ns = metadata.get("langgraph_checkpoint_ns")
+    if checkpoint_ns:
+        return checkpoint_ns.split("|", 1)[0].split(":", 1)[0]
+    return metadata.get("langgraph_node")
+
+
+def stream_node_name(namespace: tuple[str, ...], metadata: dict[str, Any] | None = None) -> str | None:
+    """
+    Returns the top-level graph node a chunk from `WorkflowGraph.stream` belongs to.
+
+    Chunks from inside an agent carry the agent node's namespace, whose first segment
+    names the node of the outer workflow graph; the workflow's own chunks have none.
+    """
+    if namespace:
+        return namespace[0].split(":", 1)[0]
+    return graph_node_name(metadata)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Counts LLM calls and token usage per graph node.
+    """
+
+    def __init__(self, metrics: RunMetrics) -> None:
+        self.metrics = metrics
+        self._run_nodes: dict[UUID, tuple[str, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, metadata: dict[str, Any] | None) -> None:
+        node_name = graph_node_name(metadata)
+        if node_name:
+            with self._lock:
+                self._run_nodes[run_id] = (node_name, (metadata or {}).get("ls_model_name"))
+
+    def on_llm_start(self, serialized: dict[str, Any], prompts: list[str], *, run_id: UUID,
+                     metadata: dict[str, Any] | None = None, **kwargs: Any) -> None:
+        self._start(run_id, metadata)
+
+    def on_chat_model_start(self, serialized: dict[str, Any], messages: list[list[Any]], *, run_id: UUID,
+                            metadata: dict[str, Any] | None = None, **kwargs: Any) -> None:
+        self._start(run_id, metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            node_name, model_name = self._run_nodes.pop(run_id, (None, None))
+        if node_name is None:
+            return
+
+        prompt_tokens = completion_tokens = 0
+        cached = True
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                cached = cached and bool(
+                    getattr(message, "response_metadata", {}).get("llm_cache_hit"))
+                usage = getattr(message, "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+
+        # Cache hits are counted by the LLM cache itself and cost no model call
+        if cached and response.generations:
+            return
+
+        usage = {"llm_calls": 1, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        cost = llm_cost(model_name, prompt_tokens, completion_tokens)
+        if cost:
+            usage["llm_cost_usd"] = cost
+        self.metrics.update(node_name, **usage)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            node_name, _ = self._run_nodes.pop(run_id, (None, None))
+        if node_name is not None:
+            self.metrics.update(node_name, llm_errors=1)
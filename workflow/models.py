@@ -0,0 +1,78 @@
+import threading
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from .cache import get_llm_cache
+from .constants import FLASH_MODEL, LLM_RATE_LIMIT_ENABLED, PRO_MODEL
+
+_models: dict[str, BaseChatModel] = {}
+_models_lock = threading.Lock()
+_model_class: type[BaseChatModel] | None = None
+
+
+def _get_model_class() -> type[BaseChatModel]:
+    """
+    Returns the Gemini chat model class, sending calls through the shared rate limiter
+    unless LLM_RATE_LIMIT_ENABLED is off. Must hold `_models_lock`.
+    """
+    global _model_class  # pylint: disable=global-statement
+    if _model_class is None:
+        # Deferred: the Gemini client takes longer to import than the rest of the workflow
+        from langchain_google_genai import ChatGoogleGenerativeAI  # pylint: disable=import-outside-toplevel
+
+        if LLM_RATE_LIMIT_ENABLED:
+            from .rate_limit import RateLimitedChatModel  # pylint: disable=import-outside-toplevel
+
+            class RateLimitedGemini(RateLimitedChatModel, ChatGoogleGenerativeAI):
+                pass
+
+            _model_class = RateLimitedGemini
+        else:
+            _model_class = ChatGoogleGenerativeAI
+    return _model_class
+
+
+def _get_model(tier: str, model_name: str) -> BaseChatModel:
+    with _models_lock:
+        if tier not in _models:
+            options = {}
+            if LLM_RATE_LIMIT_ENABLED:
+                # The limiter retries rate limited calls itself, after pausing the whole queue
+                options["max_retries"] = 1
+            _models[tier] = _get_model_class()(
+                model=model_name, temperature=0, cache=get_llm_cache(), **options)
+        return _models[tier]
+
+
+def get_pro_llm() -> BaseChatModel:
+    """
+    Returns the process-wide Pro model, creating it on first use.
+    """
+    return _get_model("pro", PRO_MODEL)
+
+
+def get_flash_llm() -> BaseChatModel:
+    """
+    Returns the process-wide Flash model, creating it on first use.
+    """
+    return _get_model("flash", FLASH_MODEL)
+
+
+def get_llm(tier: str) -> BaseChatModel:
+    """
+    Returns the process-wide model for a tier, "pro" or "flash".
+    """
+    return get_pro_llm() if tier == "pro" else get_flash_llm()
+
+
+def set_models(pro: BaseChatModel | None = None, flash: BaseChatModel | None = None) -> None:
+    """
+    Replaces the models returned by `get_pro_llm` and `get_flash_llm`, e.g. with fakes
+    in benchmarks. Passing None for either restores the default on its next use.
+    """
+    with _models_lock:
+        for tier, model in (("pro", pro), ("flash", flash)):
+            if model is None:
+                _models.pop(tier, None)
+            else:
+                _models[tier] = model
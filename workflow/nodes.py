@@ -1,4 +1,4 @@
-import os
+import asyncio
 from typing import Any, Literal
 
 import yaml
@@ -6,43 +6,85 @@ from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.output_parsers import StrOutputParser
 
 from .state import WorkflowState
-from .constants import flash_llm, INTEGRATION_ROOT_PATH
+from .metrics import record
+from .package_index import get_package_index
+from .package_store import get_package_store
+from .models import get_flash_llm
+from .context_packing import (
+    FINAL_RESULT_FOCUS,
+    SETUP_INSTRUCTIONS_FOCUS,
+    estimate_tokens,
+    pack_docs,
+    pack_manifest,
+    record_packing,
+)
+from .routing import (
+    ainvoke_routed,
+    choose_tier,
+    invoke_routed,
+    validate_integration_context,
+    validate_setup_instructions,
+)
+from .constants import (
+    CONTEXT_BUDGET_FINAL_RESULT,
+    CONTEXT_BUDGET_MANIFEST,
+    CONTEXT_BUDGET_SETUP_INSTRUCTIONS,
+    CONTEXT_PACKING_ENABLED,
+    DEBUG,
+    URL_REMOVAL_MODE,
+    URL_REMOVAL_USE_LLM,
+)
 from .agents import (
-    final_result_generation_agent,
-    setup_instructions_external_info_agent,
-    search_relevant_package_agent,
-    setup_instructions_context_agent,
+    get_final_result_generation_agent,
+    get_setup_instructions_external_info_agent,
+    get_search_relevant_package_agent,
+    get_setup_instructions_context_agent,
 )
 from .prompts import (
     setup_instructions_external_info_prompt,
     search_relevant_package_prompt,
     setup_instructions_context_prompt,
     final_result_generation_prompt,
+    research_reconciliation_prompt,
     find_relevant_package_prompt,
     FIND_RELEVANT_PACKAGE_SYSTEM_PROMPT,
 )
 from .utils import (
     extract_urls_from_markdown,
     evaluate_urls_parallel,
+    async_evaluate_urls,
+    probe_urls,
+    async_probe_urls,
+    remove_urls_from_markdown,
 )
 
 
-def find_relevant_packages_node(state: WorkflowState) -> dict[str, Any]:
+def _find_relevant_packages_request(state: WorkflowState) -> tuple[str, str | None, list[str], list[dict[str, str]]]:
     """
-    Find the most relevant packages for the user's input.
+    Matches the user input against the package index.
+
+    Returns the user input, the package name if it was resolved without the LLM (""
+    when nothing matches), and otherwise the candidate names and the LLM messages.
     """
     user_input = state["messages"][-1].content
 
-    try:
-        packages_path = os.path.join(INTEGRATION_ROOT_PATH, "packages")
-        packages = os.listdir(packages_path)
-    except FileNotFoundError:
-        return {"user_input": user_input, "integration_name": ""}
+    index = get_package_index()
+    if index is None:
+        return user_input, "", [], []
+
+    match, candidates = index.resolve(user_input)
+    if match is not None:
+        record(package_index_matches=1)
+        return user_input, match.name, [], []
+    if not candidates:
+        return user_input, "", [], []
 
-    # Use the proper prompt template
+    # Only the top candidates go into the prompt, not the whole packages directory
+    packages = "\n".join(
+        f"- {c.name}: {c.entry.title}. {c.entry.description[:150]}" for c in candidates)
     prompt = find_relevant_package_prompt.invoke({
         "user_input": user_input,
-        "packages": ", ".join(packages)
+        "packages": packages
     }).to_string()
 
     # Create messages with system prompt
@@ -50,8 +92,10 @@ def find_relevant_packages_node(state: WorkflowState) -> dict[str, Any]:
         {"role": "system", "content": FIND_RELEVANT_PACKAGE_SYSTEM_PROMPT},
         {"role": "user", "content": prompt}
     ]
+    return user_input, None, [c.name for c in candidates], messages
+
 
-    response = (flash_llm | StrOutputParser()).invoke(messages)
+def _relevant_package_update(user_input: str, packages: list[str], response: str) -> dict[str, Any]:
     answer = response.strip()
 
     # If the answer is in the packages, return the integration name
@@ -60,6 +104,30 @@ def find_relevant_packages_node(state: WorkflowState) -> dict[str, Any]:
     return {"user_input": user_input, "integration_name": answer}
 
 
+def find_relevant_packages_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Find the most relevant packages for the user's input.
+    """
+    user_input, resolved, packages, messages = _find_relevant_packages_request(state)
+    if resolved is not None:
+        return {"user_input": user_input, "integration_name": resolved}
+
+    response = (get_flash_llm() | StrOutputParser()).invoke(messages)
+    return _relevant_package_update(user_input, packages, response)
+
+
+async def afind_relevant_packages_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `find_relevant_packages_node`.
+    """
+    user_input, resolved, packages, messages = _find_relevant_packages_request(state)
+    if resolved is not None:
+        return {"user_input": user_input, "integration_name": resolved}
+
+    response = await (get_flash_llm() | StrOutputParser()).ainvoke(messages)
+    return _relevant_package_update(user_input, packages, response)
+
+
 def get_package_info_node(state: WorkflowState) -> dict[str, Any]:
     """
     Get More information about the integration package.
@@ -69,22 +137,16 @@ def get_package_info_node(state: WorkflowState) -> dict[str, Any]:
     if not integration_name:
         return {"integration_manifest": {}, "integration_docs": ""}
 
-    package_path = os.path.join(
-        INTEGRATION_ROOT_PATH, "packages", integration_name)
-    manifest_path = os.path.join(package_path, "manifest.yml")
-    docs_path = os.path.join(package_path, "_dev",
-                             "build", "docs", "README.md")
-
+    # Parsed once per file change and shared across runs
+    store = get_package_store()
     try:
-        with open(manifest_path, "r", encoding="utf-8") as f:
-            try:
-                integration_manifest = yaml.safe_load(f)
-            except yaml.YAMLError as e:
-                print(f"Error loading manifest: {e}")
-                integration_manifest = {}
-
-        with open(docs_path, "r", encoding="utf-8") as f:
-            integration_docs = f.read()
+        try:
+            integration_manifest = store.manifest(integration_name)
+        except yaml.YAMLError as e:
+            print(f"Error loading manifest: {e}")
+            integration_manifest = {}
+
+        integration_docs = store.docs(integration_name)
     except FileNotFoundError as e:
         print(f"Error loading manifest or docs: {e}")
         return {"integration_manifest": {}, "integration_docs": ""}
@@ -92,33 +154,76 @@ def get_package_info_node(state: WorkflowState) -> dict[str, Any]:
     return {"integration_manifest": integration_manifest, "integration_docs": integration_docs}
 
 
-def setup_instructions_context_node(state: WorkflowState) -> dict[str, Any]:
+async def aget_package_info_node(state: WorkflowState) -> dict[str, Any]:
     """
-    Find the relevant product setup instructions for the product from the integration docs.
+    Async version of `get_package_info_node`. The file reads run in a worker thread.
     """
+    return await asyncio.to_thread(get_package_info_node, state)
+
+
+def _agent_answer(response: dict[str, Any]) -> str:
+    message: AIMessage = response["messages"][-1]
+    return message.text
+
+
+def _setup_instructions_context_input(state: WorkflowState) -> dict[str, Any]:
     integration_name = state["integration_name"]
     integration_docs = state["integration_docs"]
     integration_manifest = state["integration_manifest"]
 
+    if CONTEXT_PACKING_ENABLED:
+        packed_docs = pack_docs(integration_docs, CONTEXT_BUDGET_SETUP_INSTRUCTIONS,
+                                SETUP_INSTRUCTIONS_FOCUS)
+        packed_manifest = pack_manifest(integration_manifest, CONTEXT_BUDGET_MANIFEST)
+        record_packing(packed_docs, packed_manifest)
+        integration_docs, integration_manifest = packed_docs.text, packed_manifest.text
+
     prompt = setup_instructions_context_prompt.invoke({
         "integration_name": integration_name,
         "integration_docs": integration_docs,
         "integration_manifest": integration_manifest
     }).to_string()
+    return {"messages": [HumanMessage(content=prompt)]}
 
-    response = setup_instructions_context_agent.invoke(
-        {"messages": [HumanMessage(content=prompt)]}
-    )
 
-    message: AIMessage = response["messages"][-1]
-    return {"integration_context": message.text.strip('`')}
+def _has_package_info(state: WorkflowState) -> bool:
+    return bool(state["integration_docs"] or state["integration_manifest"])
 
 
-def setup_instructions_external_info_node(state: WorkflowState) -> dict[str, Any]:
+def _input_tokens(inputs: dict[str, Any]) -> int:
+    return sum(estimate_tokens(message.content) for message in inputs["messages"])
+
+
+def setup_instructions_context_node(state: WorkflowState) -> dict[str, Any]:
     """
-    Find the product setup instructions from internet for the product.
+    Find the relevant product setup instructions for the product from the integration docs.
+    Returns an empty context without calling the agent when there are no docs or manifest.
     """
+    if not _has_package_info(state):
+        return {"integration_context": ""}
+
+    inputs = _setup_instructions_context_input(state)
+    response = invoke_routed(
+        "setup_instructions_context", get_setup_instructions_context_agent, inputs,
+        validate_integration_context, choose_tier(_input_tokens(inputs)))
+    return {"integration_context": _agent_answer(response).strip('`')}
+
 
+async def asetup_instructions_context_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `setup_instructions_context_node`.
+    """
+    if not _has_package_info(state):
+        return {"integration_context": ""}
+
+    inputs = _setup_instructions_context_input(state)
+    response = await ainvoke_routed(
+        "setup_instructions_context", get_setup_instructions_context_agent, inputs,
+        validate_integration_context, choose_tier(_input_tokens(inputs)))
+    return {"integration_context": _agent_answer(response).strip('`')}
+
+
+def _setup_instructions_external_info_input(state: WorkflowState) -> dict[str, Any]:
     product_name = state["integration_name"]
     integration_context = state["integration_context"]
 
@@ -126,19 +231,38 @@ def setup_instructions_external_info_node(state: WorkflowState) -> dict[str, Any
         "integration_name": product_name,
         "integration_context": integration_context if integration_context else ""
     }).to_string()
+    return {"messages": [HumanMessage(content=prompt)]}
 
-    response = setup_instructions_external_info_agent.invoke(
-        {"messages": [HumanMessage(content=prompt)]}
-    )
 
-    message: AIMessage = response["messages"][-1]
-    return {"product_setup_instructions": message.text.strip('`')}
+def _setup_instructions_external_info_tier(state: WorkflowState, inputs: dict[str, Any]) -> str:
+    # New integrations have no docs to anchor the research to, so it goes to Pro
+    has_context = bool(state["integration_context"]) or _has_package_info(state)
+    return choose_tier(_input_tokens(inputs), hard=not has_context)
 
 
-def search_relevant_package_node(state: WorkflowState) -> dict[str, Any]:
+def setup_instructions_external_info_node(state: WorkflowState) -> dict[str, Any]:
     """
-    Find the relevant package for the product.
+    Find the product setup instructions from internet for the product.
+    """
+    inputs = _setup_instructions_external_info_input(state)
+    response = invoke_routed(
+        "setup_instructions_external_info", get_setup_instructions_external_info_agent, inputs,
+        validate_setup_instructions, _setup_instructions_external_info_tier(state, inputs))
+    return {"product_setup_instructions": _agent_answer(response).strip('`')}
+
+
+async def asetup_instructions_external_info_node(state: WorkflowState) -> dict[str, Any]:
     """
+    Async version of `setup_instructions_external_info_node`.
+    """
+    inputs = _setup_instructions_external_info_input(state)
+    response = await ainvoke_routed(
+        "setup_instructions_external_info", get_setup_instructions_external_info_agent, inputs,
+        validate_setup_instructions, _setup_instructions_external_info_tier(state, inputs))
+    return {"product_setup_instructions": _agent_answer(response).strip('`')}
+
+
+def _search_relevant_package_input(state: WorkflowState) -> dict[str, Any]:
     user_input = state["user_input"]
 
     print("[Experimental] Searching for relevant package for the product...")
@@ -146,13 +270,25 @@ def search_relevant_package_node(state: WorkflowState) -> dict[str, Any]:
     prompt = search_relevant_package_prompt.invoke({
         "user_input": user_input
     }).to_string()
+    return {"messages": [HumanMessage(content=prompt)]}
 
-    response = search_relevant_package_agent.invoke(
-        {"messages": [HumanMessage(content=prompt)]}
-    )
 
-    message: AIMessage = response["messages"][-1]
-    return {"integration_name": message.text.lower().strip()}
+def search_relevant_package_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Find the relevant package for the product.
+    """
+    response = get_search_relevant_package_agent().invoke(
+        _search_relevant_package_input(state))
+    return {"integration_name": _agent_answer(response).lower().strip()}
+
+
+async def asearch_relevant_package_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `search_relevant_package_node`.
+    """
+    response = await get_search_relevant_package_agent().ainvoke(
+        _search_relevant_package_input(state))
+    return {"integration_name": _agent_answer(response).lower().strip()}
 
 
 def is_existing_integration(state: WorkflowState) -> Literal["yes", "no"]:
@@ -167,25 +303,86 @@ def is_existing_integration(state: WorkflowState) -> Literal["yes", "no"]:
     return "yes"
 
 
-def final_result_generation_node(state: WorkflowState) -> dict[str, Any]:
+def _research_reconciliation_messages(state: WorkflowState) -> list[dict[str, str]]:
+    prompt = research_reconciliation_prompt.invoke({
+        "integration_name": state["integration_name"],
+        "integration_context": state["integration_context"],
+        "product_setup_instructions": state["product_setup_instructions"],
+    }).to_string()
+    return [{"role": "user", "content": prompt}]
+
+
+def _needs_reconciliation(state: WorkflowState) -> bool:
+    return bool(state["integration_context"] and state["product_setup_instructions"])
+
+
+def research_reconciliation_node(state: WorkflowState) -> dict[str, Any]:
     """
-    Generate the final result.
+    Align the web research with the local integration context.
+    Used in parallel research mode, where the web research agent runs without
+    the context, so ports, protocols and formats may disagree with the integration.
+    """
+    if not _needs_reconciliation(state):
+        return {}
+
+    try:
+        response = (get_flash_llm() | StrOutputParser()).invoke(
+            _research_reconciliation_messages(state))
+    except (RuntimeError, ValueError, AttributeError) as e:
+        print(f"[Research Reconciliation] Keeping unreconciled setup steps: {e}")
+        return {}
+    return {"product_setup_instructions": response.strip().strip('`')}
+
+
+async def aresearch_reconciliation_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `research_reconciliation_node`.
     """
+    if not _needs_reconciliation(state):
+        return {}
+
+    try:
+        response = await (get_flash_llm() | StrOutputParser()).ainvoke(
+            _research_reconciliation_messages(state))
+    except (RuntimeError, ValueError, AttributeError) as e:
+        print(f"[Research Reconciliation] Keeping unreconciled setup steps: {e}")
+        return {}
+    return {"product_setup_instructions": response.strip().strip('`')}
+
+
+def _final_result_generation_input(state: WorkflowState) -> dict[str, Any]:
+    integration_docs = state["integration_docs"]
+    if CONTEXT_PACKING_ENABLED:
+        # The integration context already carries the setup details from the docs
+        packed_docs = pack_docs(integration_docs, CONTEXT_BUDGET_FINAL_RESULT, FINAL_RESULT_FOCUS)
+        record_packing(packed_docs)
+        integration_docs = packed_docs.text
 
     prompt = final_result_generation_prompt.invoke({
         "integration_name": state["integration_name"],
         "integration_context": state["integration_context"],
-        "integration_docs": state["integration_docs"],
+        "integration_docs": integration_docs,
         "product_setup_instructions": state["product_setup_instructions"],
     }).to_string()
+    return {"messages": [HumanMessage(content=prompt)]}
 
-    response = final_result_generation_agent.invoke(
-        {"messages": [HumanMessage(content=prompt)]}
-    )
 
-    message: AIMessage = response["messages"][-1]
+def final_result_generation_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Generate the final result.
+    """
+    response = get_final_result_generation_agent().invoke(
+        _final_result_generation_input(state))
+    return {"final_result": _agent_answer(response).strip('`')}
 
-    return {"final_result": message.text.strip('`')}
+
+async def afinal_result_generation_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `final_result_generation_node`.
+    """
+    response = await get_final_result_generation_agent().ainvoke(
+        _final_result_generation_input(state))
+    return {"final_result": _agent_answer(response).strip('`')}
 
 
 def extract_urls_node(state: WorkflowState) -> dict[str, Any]:
@@ -201,13 +398,50 @@ def extract_urls_node(state: WorkflowState) -> dict[str, Any]:
     return {"urls_to_verify": urls}
 
 
-def url_evaluation_node(state: WorkflowState) -> dict[str, Any]:
+def url_probe_node(state: WorkflowState) -> dict[str, Any]:
     """
-    Evaluate all URLs in parallel to determine which should be removed.
+    Probe all URLs concurrently and mark dead links for removal.
     Step 2 of parallel URL verification.
-    Uses LangChain's batch() for parallel execution.
+    Only URLs that are still reachable go on to the full evaluation.
     """
     urls = state["urls_to_verify"]
+
+    if not urls:
+        return {"url_probes": [], "urls_to_remove": []}
+
+    return _url_probe_update(probe_urls(urls))
+
+
+async def aurl_probe_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `url_probe_node`.
+    """
+    urls = state["urls_to_verify"]
+
+    if not urls:
+        return {"url_probes": [], "urls_to_remove": []}
+
+    return _url_probe_update(await async_probe_urls(urls))
+
+
+def _url_probe_update(probes: list[dict[str, Any]]) -> dict[str, Any]:
+    if DEBUG:
+        for probe in probes:
+            status = "ok  " if probe["reachable"] else "dead"
+            print(f"[URL Probe] {status} {probe['latency_ms']:>8.1f} ms {probe['url']} ({probe['reason']})")
+
+    urls_to_remove = [probe["url"]
+                      for probe in probes if not probe["reachable"]]
+    return {"url_probes": probes, "urls_to_remove": urls_to_remove}
+
+
+def url_evaluation_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Evaluate all reachable URLs in parallel to determine which should be removed.
+    Step 3 of parallel URL verification.
+    Uses LangChain's batch() for parallel execution.
+    """
+    urls = _reachable_urls(state)
     final_result = state["final_result"]
     integration_name = state["integration_name"]
 
@@ -220,13 +454,50 @@ def url_evaluation_node(state: WorkflowState) -> dict[str, Any]:
             urls=urls,
             markdown_content=final_result,
             integration_name=integration_name,
-            llm=flash_llm,
-            max_concurrent=5  # Limit concurrent browser instances
+            llm=get_flash_llm(),
+            max_concurrent=5  # Browser contexts are capped by the shared pool
+        )
+    except (RuntimeError, OSError, ValueError) as e:
+        print(f"[URL Verification] Error during parallel evaluation: {e}")
+        return {"urls_to_remove": []}
+
+    return {"urls_to_remove": _urls_marked_for_removal(evaluation_results)}
+
+
+async def aurl_evaluation_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `url_evaluation_node`.
+    """
+    urls = _reachable_urls(state)
+
+    if not urls:
+        return {"urls_to_remove": []}
+
+    try:
+        evaluation_results = await async_evaluate_urls(
+            urls=urls,
+            markdown_content=state["final_result"],
+            integration_name=state["integration_name"],
+            llm=get_flash_llm(),
+            max_concurrent=5
         )
     except (RuntimeError, OSError, ValueError) as e:
         print(f"[URL Verification] Error during parallel evaluation: {e}")
         return {"urls_to_remove": []}
 
+    return {"urls_to_remove": _urls_marked_for_removal(evaluation_results)}
+
+
+def _reachable_urls(state: WorkflowState) -> list[str]:
+    urls = state["urls_to_verify"]
+    probes = state.get("url_probes") or []
+    if probes:
+        reachable = {probe["url"] for probe in probes if probe["reachable"]}
+        urls = [url for url in urls if url in reachable]
+    return urls
+
+
+def _urls_marked_for_removal(evaluation_results: list[dict[str, Any]]) -> list[str]:
     # Collect URLs that should be removed
     urls_to_remove = []
 
@@ -237,13 +508,15 @@ def url_evaluation_node(state: WorkflowState) -> dict[str, Any]:
         if should_remove:
             urls_to_remove.append(url)
 
-    return {"urls_to_remove": urls_to_remove}
+    return urls_to_remove
 
 
 def url_removal_node(state: WorkflowState) -> dict[str, Any]:
     """
-    Remove marked URLs from the final result using LLM.
-    Step 3 of parallel URL verification.
+    Remove marked URLs from the final result.
+    Step 4 of parallel URL verification.
+    Links are removed deterministically; the LLM pass only runs when enabled
+    with URL_REMOVAL_USE_LLM and some URLs could not be removed.
     """
     urls_to_remove = state["urls_to_remove"]
     final_result = state["final_result"]
@@ -251,8 +524,39 @@ def url_removal_node(state: WorkflowState) -> dict[str, Any]:
     if not urls_to_remove:
         return {"final_result": final_result}
 
+    cleaned_result = remove_urls_from_markdown(
+        final_result, urls_to_remove, mode=URL_REMOVAL_MODE)
+
+    remaining_urls = [url for url in urls_to_remove if url in cleaned_result]
+    if URL_REMOVAL_USE_LLM and remaining_urls:
+        cleaned_result = _llm_remove_urls(cleaned_result, remaining_urls)
+
+    return {"final_result": cleaned_result}
+
+
+async def aurl_removal_node(state: WorkflowState) -> dict[str, Any]:
+    """
+    Async version of `url_removal_node`.
+    """
+    urls_to_remove = state["urls_to_remove"]
+    final_result = state["final_result"]
+
+    if not urls_to_remove:
+        return {"final_result": final_result}
+
+    cleaned_result = remove_urls_from_markdown(
+        final_result, urls_to_remove, mode=URL_REMOVAL_MODE)
+
+    remaining_urls = [url for url in urls_to_remove if url in cleaned_result]
+    if URL_REMOVAL_USE_LLM and remaining_urls:
+        cleaned_result = await _allm_remove_urls(cleaned_result, remaining_urls)
+
+    return {"final_result": cleaned_result}
+
+
+def _url_removal_prompt(final_result: str, urls_to_remove: list[str]) -> str:
     # Create a prompt for the LLM to remove URLs
-    removal_prompt = f"""
+    return f"""
 Remove the following URLs from the markdown document. Remove the entire line or markdown link containing each URL.
 Preserve all other content and formatting exactly as it is.
 
@@ -269,12 +573,26 @@ Return the cleaned document with the specified URLs removed. Maintain all markdo
 Answer:
 """
 
+
+def _llm_remove_urls(final_result: str, urls_to_remove: list[str]) -> str:
+    """
+    Remove URLs from the document using LLM.
+    """
+    removal_prompt = _url_removal_prompt(final_result, urls_to_remove)
     try:
-        response = flash_llm.invoke(
+        response = get_flash_llm().invoke(
             [{"role": "user", "content": removal_prompt}])
-        cleaned_result = response.content.strip('`').strip()
-
-        return {"final_result": cleaned_result}
+        return response.content.strip('`').strip()
     except (RuntimeError, ValueError, AttributeError):
         # Return original result if removal fails
-        return {"final_result": final_result}
+        return final_result
+
+
+async def _allm_remove_urls(final_result: str, urls_to_remove: list[str]) -> str:
+    removal_prompt = _url_removal_prompt(final_result, urls_to_remove)
+    try:
+        response = await get_flash_llm().ainvoke(
+            [{"role": "user", "content": removal_prompt}])
+        return response.content.strip('`').strip()
+    except (RuntimeError, ValueError, AttributeError):
+        return final_result
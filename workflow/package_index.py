@@ -0,0 +1,250 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+
+import yaml
+
+from .package_store import PackageStore, get_package_store
+from .constants import (
+    PACKAGE_INDEX_PATH,
+    PACKAGE_MATCH_THRESHOLD,
+    PACKAGE_MATCH_TOP_K,
+)
+
+# The best candidate must beat the runner-up by this much to be resolved without the LLM
+_CONFIDENT_MARGIN = 0.1
+
+_NON_ALNUM_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_ALNUM_PATTERN.sub(" ", text.lower()).strip()
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {_normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+@dataclass
+class PackageEntry:
+    """
+    The searchable fields of one integration package manifest.
+    """
+    name: str
+    title: str = ""
+    description: str = ""
+    categories: list[str] = field(default_factory=list)
+    # Policy template titles, which often spell out the product differently
+    aliases: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_manifest(cls, name: str, manifest: dict) -> "PackageEntry":
+        return cls(
+            # The directory name is what get_package_info_node looks up
+            name=name,
+            title=str(manifest.get("title") or ""),
+            description=str(manifest.get("description") or ""),
+            categories=[str(c) for c in manifest.get("categories") or []],
+            aliases=[str(t["title"]) for t in manifest.get("policy_templates") or []
+                     if isinstance(t, dict) and t.get("title")],
+        )
+
+    def text(self) -> str:
+        return " ".join([self.name.replace("_", " "), self.title, self.description,
+                         *self.categories, *self.aliases])
+
+
+@dataclass
+class PackageMatch:
+    """
+    A package scored against a user query.
+    """
+    entry: PackageEntry
+    score: float
+    exact: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.entry.name
+
+
+class PackageIndex:
+    """
+    Lexical index over the integration package manifests.
+
+    Each package is scored by character-trigram similarity of the query to its name
+    and title, blended with BM25 over all its text. Exact matches on the name or
+    title, and clear winners above `PACKAGE_MATCH_THRESHOLD`, are resolved without
+    an LLM call; otherwise only the top candidates are offered to the LLM. A query
+    that only names a vendor with several packages is never a clear winner, since
+    trigram similarity favours whichever of them has the shortest name.
+    """
+
+    def __init__(self, entries: list[PackageEntry]) -> None:
+        self.entries = entries
+        self._by_name = {entry.name: entry for entry in entries}
+        self._name_trigrams = [_trigrams(entry.name.replace("_", " ")) for entry in entries]
+        self._title_trigrams = [_trigrams(entry.title) for entry in entries]
+        self._prefix_texts = [(_normalize(entry.name), _normalize(entry.title)) for entry in entries]
+
+        self._doc_tokens = [Counter(_normalize(entry.text()).split()) for entry in entries]
+        self._doc_lengths = [sum(tokens.values()) for tokens in self._doc_tokens]
+        self._avg_length = (sum(self._doc_lengths) / len(entries)) if entries else 0.0
+        document_frequency: Counter[str] = Counter()
+        for tokens in self._doc_tokens:
+            document_frequency.update(tokens.keys())
+        self._idf = {
+            token: math.log(1 + (len(entries) - df + 0.5) / (df + 0.5))
+            for token, df in document_frequency.items()
+        }
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._by_name)
+
+    def _bm25(self, query_tokens: list[str], idx: int, k1: float = 1.5, b: float = 0.75) -> float:
+        tokens = self._doc_tokens[idx]
+        length_norm = k1 * (1 - b + b * self._doc_lengths[idx] / (self._avg_length or 1))
+        score = 0.0
+        for token in query_tokens:
+            tf = tokens.get(token, 0)
+            if tf:
+                score += self._idf[token] * tf * (k1 + 1) / (tf + length_norm)
+        return score
+
+    def search(self, query: str, top_k: int = PACKAGE_MATCH_TOP_K) -> list[PackageMatch]:
+        """
+        Returns the `top_k` best scoring packages for a query, best first.
+        """
+        normalized = _normalize(query)
+        if not normalized:
+            return []
+
+        slug = normalized.replace(" ", "_")
+        exact = self._by_name.get(slug)
+        if exact is None:
+            exact = next((entry for entry in self.entries
+                          if _normalize(entry.title) == normalized), None)
+
+        query_trigrams = _trigrams(query)
+        query_tokens = normalized.split()
+        bm25 = [self._bm25(query_tokens, idx) for idx in range(len(self.entries))]
+        max_bm25 = max(bm25, default=0.0) or 1.0
+
+        matches = []
+        for idx, entry in enumerate(self.entries):
+            if entry is exact:
+                matches.append(PackageMatch(entry, 1.0, exact=True))
+                continue
+            fuzzy = max(_dice(query_trigrams, self._name_trigrams[idx]),
+                        _dice(query_trigrams, self._title_trigrams[idx]))
+            matches.append(PackageMatch(entry, 0.7 * fuzzy + 0.3 * bm25[idx] / max_bm25))
+
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return [match for match in matches[:top_k] if match.score > 0]
+
+    def _is_shared_prefix(self, query: str) -> bool:
+        """
+        Whether the query begins the name or title of more than one package, like a vendor name.
+        """
+        normalized = _normalize(query)
+        prefixed = sum(any(text.startswith(normalized) for text in texts) for texts in self._prefix_texts)
+        return prefixed > 1
+
+    def resolve(self, query: str, top_k: int = PACKAGE_MATCH_TOP_K) -> tuple[PackageMatch | None, list[PackageMatch]]:
+        """
+        Returns the confidently matched package, if any, and the top candidates.
+        """
+        candidates = self.search(query, top_k)
+        if not candidates:
+            return None, []
+
+        best = candidates[0]
+        runner_up = candidates[1].score if len(candidates) > 1 else 0.0
+        if best.exact:
+            return best, candidates
+        if best.score >= PACKAGE_MATCH_THRESHOLD and best.score - runner_up >= _CONFIDENT_MARGIN \
+                and not self._is_shared_prefix(query):
+            return best, candidates
+        return None, candidates
+
+    @classmethod
+    def build(cls, store: PackageStore) -> "PackageIndex":
+        """
+        Reads every package manifest in the store.
+        """
+        entries = []
+        for name in store.package_names():
+            try:
+                manifest = store.manifest(name)
+            except (OSError, yaml.YAMLError):
+                # Keep packages with unreadable manifests matchable by directory name
+                manifest = {}
+            entries.append(PackageEntry.from_manifest(name, manifest))
+        return cls(entries)
+
+    @classmethod
+    def load_or_build(cls, store: PackageStore, index_path: str = PACKAGE_INDEX_PATH) -> "PackageIndex":
+        """
+        Loads the persisted index, rebuilding it when any manifest was added, removed or changed.
+        """
+        fingerprint = _fingerprint(store.packages_path)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("fingerprint") == fingerprint:
+                return cls([PackageEntry(**entry) for entry in data["entries"]])
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            pass
+
+        index = cls.build(store)
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint,
+                       "entries": [asdict(entry) for entry in index.entries]}, f)
+        os.replace(tmp_path, index_path)
+        return index
+
+
+def _fingerprint(packages_path: str) -> str:
+    digest = hashlib.sha256(os.path.abspath(packages_path).encode("utf-8"))
+    for name in sorted(os.listdir(packages_path)):
+        try:
+            stat = os.stat(os.path.join(packages_path, name, "manifest.yml"))
+            digest.update(f"{name}:{stat.st_mtime_ns}:{stat.st_size}\n".encode("utf-8"))
+        except OSError:
+            digest.update(f"{name}:-\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+_package_index: PackageIndex | None = None
+_package_index_lock = threading.Lock()
+
+
+def get_package_index() -> PackageIndex | None:
+    """
+    Returns the process-wide package index, or None if there is no packages directory.
+    """
+    global _package_index  # pylint: disable=global-statement
+    store = get_package_store()
+    with _package_index_lock:
+        if _package_index is None:
+            if not os.path.isdir(store.packages_path):
+                return None
+            _package_index = PackageIndex.load_or_build(store)
+        return _package_index
@@ -0,0 +1,137 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import yaml
+
+from .cache import JsonDiskCache
+from .constants import (
+    get_integration_root_path,
+    PACKAGE_CACHE_DIR,
+    PACKAGE_CACHE_ENABLED,
+    PACKAGE_PRELOAD_WORKERS,
+)
+
+# libyaml's loader is an order of magnitude faster than the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _load_yaml(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=_YAML_LOADER)  # nosec B506 - safe loader
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+class PackageStore:
+    """
+    Parsed package manifests and docs, cached by file path, mtime and size.
+
+    Files are read and parsed once per change: repeated reads of an unchanged file
+    cost a single `stat`. Parsed manifests are also kept in a `JsonDiskCache`, so a new
+    process only parses the manifests that changed since the last run. Docs are plain
+    text, so they are only cached in memory.
+    """
+
+    def __init__(self, packages_path: str, disk_cache: JsonDiskCache | None = None) -> None:
+        self.packages_path = packages_path
+        self.disk_cache = disk_cache
+        self._memory: dict[str, tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, path: str, loader: Callable[[str], Any], persist: bool) -> Any:
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+        with self._lock:
+            cached = self._memory.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        value = self.disk_cache.get(key) if persist and self.disk_cache else None
+        if value is None:
+            value = loader(path)
+            if persist and self.disk_cache:
+                try:
+                    self.disk_cache.set(key, value)
+                except (TypeError, ValueError):
+                    # e.g. YAML dates, which JSON cannot represent; memory caching still applies
+                    pass
+
+        with self._lock:
+            self._memory[path] = (key, value)
+        return value
+
+    def manifest_path(self, name: str) -> str:
+        return os.path.join(self.packages_path, name, "manifest.yml")
+
+    def docs_path(self, name: str) -> str:
+        return os.path.join(self.packages_path, name, "_dev", "build", "docs", "README.md")
+
+    def manifest(self, name: str) -> dict:
+        """
+        Returns the parsed `manifest.yml` of a package.
+
+        Raises:
+            FileNotFoundError: If the package has no manifest.
+            yaml.YAMLError: If the manifest is not valid YAML.
+        """
+        return self._read(self.manifest_path(name), _load_yaml, persist=True) or {}
+
+    def docs(self, name: str) -> str:
+        """
+        Returns the `_dev/build/docs/README.md` of a package.
+
+        Raises:
+            FileNotFoundError: If the package has no docs.
+        """
+        return self._read(self.docs_path(name), _read_text, persist=False)
+
+    def package_names(self) -> list[str]:
+        return sorted(os.listdir(self.packages_path))
+
+    def preload_all(self, max_workers: int = PACKAGE_PRELOAD_WORKERS) -> int:
+        """
+        Reads every package's manifest and docs in parallel, so later lookups hit the cache.
+        Returns the number of packages loaded.
+        """
+        def _preload(name: str) -> bool:
+            loaded = False
+            for read in (self.manifest, self.docs):
+                try:
+                    read(name)
+                    loaded = True
+                except (OSError, yaml.YAMLError):
+                    pass
+            return loaded
+
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="package-preload") as executor:
+            return sum(executor.map(_preload, self.package_names()))
+
+
+_package_store: PackageStore | None = None
+_package_store_lock = threading.Lock()
+
+
+def get_package_store() -> PackageStore:
+    """
+    Returns the process-wide package store for `INTEGRATION_ROOT_PATH/packages`.
+
+    Raises:
+        ValueError: If `INTEGRATION_ROOT_PATH` is not set.
+    """
+    global _package_store  # pylint: disable=global-statement
+    with _package_store_lock:
+        if _package_store is None:
+            disk_cache = JsonDiskCache(
+                PACKAGE_CACHE_DIR,
+                ttl_seconds=float("inf"),  # keys change whenever the file does
+                max_bytes=100 * 1024 * 1024,
+            ) if PACKAGE_CACHE_ENABLED else None
+            _package_store = PackageStore(
+                os.path.join(get_integration_root_path(), "packages"), disk_cache)
+        return _package_store
@@ -10,17 +10,18 @@ integration package based on user input.
 
 Your task:
 1. Analyze the user's input to understand what product/service they want
-2. Match it to the most relevant package name from the provided list
+2. Match it to the most relevant package name from the provided candidates
 3. Return ONLY the exact package name, no other text
 
 Output rules:
-- Return the exact package name as it appears in the list
+- Return the exact package name as it appears before the colon in the list
 - If no exact match exists, return an empty string
 - No explanations, no additional text
 """
 
 find_relevant_package_prompt = PromptTemplate(
-    template="""Available packages: {packages}
+    template="""Candidate packages (name: title. description):
+{packages}
 
 User input: {user_input}
 
@@ -447,3 +448,64 @@ web_page_content_summarizer_prompt = PromptTemplate(
     Keep it concise and actionable. Focus only on {focus_area}.""",
     input_variables=["content_to_analyze", "focus_area"]
 )
+
+
+# ============================================================================
+# URL Verification Prompts
+# ============================================================================
+
+url_batch_evaluation_prompt = PromptTemplate(
+    template="""Evaluate whether each of the following URLs should be kept in the section of the
+documentation it appears in.
+
+Product: {integration_name}
+
+Validation criteria by section type:
+- product_info: Content should be about the product (general info, features, overview)
+- setup: Content MUST contain logging/syslog setup instructions
+- documentation: Content should be documentation/reference material
+- troubleshooting: Content should have troubleshooting information
+- other: Content should be relevant to the section
+
+URLs:
+
+{urls_block}
+
+Return ONLY a JSON list with one object per URL, using the number in brackets as its id:
+[{{"id": 1, "verdict": "KEEP", "reason": "<brief reason>"}}, {{"id": 2, "verdict": "REMOVE", "reason": "<brief reason>"}}]
+
+Answer:""",
+    input_variables=["integration_name", "urls_block"]
+)
+
+
+# ============================================================================
+# Research Reconciliation Prompts
+# ============================================================================
+
+research_reconciliation_prompt = PromptTemplate(
+    template="""Reconcile the vendor setup steps below with the integration context. Both were
+researched independently for the same product.
+
+Integration name: {integration_name}
+
+Integration Context:
+```
+{integration_context}
+```
+
+Vendor Setup Steps:
+```
+{product_setup_instructions}
+```
+
+Rules:
+- Keep the vendor setup steps and their structure, references and links unchanged
+- Where a port, protocol, log format or data type in the steps contradicts the integration
+  context, use the value from the integration context
+- Do not add steps that are not supported by either source
+
+Return ONLY the reconciled setup steps in markdown format:""",
+    input_variables=["integration_name",
+                     "integration_context", "product_setup_instructions"]
+)
@@ -0,0 +1,402 @@
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+
+from langchain_core.messages import BaseMessage
+
+from .context_packing import estimate_tokens
+from .metrics import record
+from .constants import (
+    FLASH_MODEL,
+    FLASH_RPM,
+    FLASH_TPM,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    PRO_MODEL,
+    PRO_RPM,
+    PRO_TPM,
+)
+
+T = TypeVar("T")
+
+# Lanes in the order they are served; a waiting call in an earlier lane always goes first
+PRIORITY_LANES = ("interactive", "batch")
+
+# Reserved for the reply until the real usage is known
+_OUTPUT_TOKEN_ALLOWANCE = 1024
+# How often async waiters and waiters behind the head of the queue check again
+_POLL_SECONDS = 0.05
+
+# Only a status spelled out as such; a bare "429" may be a token count, an ID or a port
+_RATE_LIMIT_MESSAGE_PATTERN = re.compile(
+    r"\bRESOURCE_EXHAUSTED\b|\b429\b[^\n]{0,20}Too Many Requests", re.IGNORECASE)
+# How far down a chain of re-raised errors to look for the API's status
+_MAX_ERROR_CAUSES = 5
+_RETRY_HINT_PATTERNS = (
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retryDelay['\"]?\s*:\s*['\"]?([\d.]+)s", re.IGNORECASE),
+)
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+
+@contextmanager
+def llm_priority(lane: str) -> Iterator[None]:
+    """
+    Runs the LLM calls made inside the block in the given priority lane.
+    """
+    if lane not in PRIORITY_LANES:
+        raise ValueError(f"Unknown priority lane {lane!r}, expected one of {PRIORITY_LANES}")
+    token = _priority.set(lane)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimitError(RuntimeError):
+    """
+    Raised when a model call is still rate limited after every retry.
+    """
+
+
+def _is_rate_limit_status(value: Any) -> bool:
+    # HTTP codes compare equal to ints; gRPC status codes are enums named after the status
+    return value == 429 or value == "RESOURCE_EXHAUSTED" or getattr(value, "name", None) == "RESOURCE_EXHAUSTED"
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Whether an error from a model client means "too many requests".
+
+    Client wrappers re-raise the API error, so its causes are checked too. A 503
+    "unavailable" is an outage, not a quota, and is not retried here.
+    """
+    cause: BaseException | None = error
+    for _ in range(_MAX_ERROR_CAUSES):
+        if cause is None:
+            break
+        for attribute in ("code", "status_code", "status"):
+            if _is_rate_limit_status(getattr(cause, attribute, None)):
+                return True
+        if _is_rate_limit_status(getattr(getattr(cause, "response", None), "status_code", None)):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return _RATE_LIMIT_MESSAGE_PATTERN.search(str(error)) is not None
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """
+    Returns the delay the server asked for, from a Retry-After header or the error message.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value is not None:
+            return float(value)
+    except (AttributeError, TypeError, ValueError):
+        pass
+    for pattern in _RETRY_HINT_PATTERNS:
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def retry_delay(attempt: int, error: BaseException) -> float:
+    """
+    Exponential backoff with jitter, but never shorter than the server's retry hint.
+    """
+    backoff = min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt)
+    return max(retry_after_seconds(error) or 0.0, random.uniform(backoff / 2, backoff))
+
+
+class TokenBucket:
+    """
+    A bucket holding up to `per_minute` units, refilled continuously. Not thread-safe.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # Larger requests than the bucket holds wait for a full bucket instead of forever
+        missing = min(amount, self.capacity) - self.level
+        return max(missing / self.rate, 0.0) if self.rate else 0.0
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def adjust(self, amount: float) -> None:
+        # Can go negative, which delays the next calls until the debt is refilled
+        self.level = min(self.capacity, self.level - amount)
+
+
+class ModelRateLimiter:
+    """
+    Request and token budgets for one model, shared by every node and run in the process.
+
+    Calls wait in a single queue ordered by priority lane, then by arrival. Only the
+    head of the queue may take from the buckets, so a large request is not starved by
+    a stream of small ones. A rate-limited response pauses the whole queue for the
+    retry delay, since every other call would be rejected too.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int) -> None:
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.peak_queue_depth = 0
+
+        self._condition = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._paused_until = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def _enqueue(self) -> tuple[int, int]:
+        ticket = (PRIORITY_LANES.index(_priority.get()), next(self._tickets))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            self.peak_queue_depth = max(self.peak_queue_depth, len(self._queue))
+        return ticket
+
+    def _leave(self, ticket: tuple[int, int]) -> None:
+        with self._condition:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            self._condition.notify_all()
+
+    def _try_take(self, ticket: tuple[int, int], tokens: int) -> float:
+        """
+        Takes one request and `tokens` tokens if `ticket` is at the head of the queue.
+        Must hold the condition. Returns 0 on success, otherwise how long to wait.
+        """
+        if self._queue[0] != ticket:
+            return _POLL_SECONDS
+        now = time.monotonic()
+        wait = max(self._paused_until - now,
+                   self.requests.wait_time(1, now),
+                   self.tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        heapq.heappop(self._queue)
+        self._condition.notify_all()
+        return 0.0
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Blocks until the call may be sent.
+        """
+        ticket = self._enqueue()
+        started = time.perf_counter()
+        try:
+            with self._condition:
+                while (wait := self._try_take(ticket, tokens)) > 0:
+                    self._condition.wait(timeout=wait)
+        except BaseException:
+            self._leave(ticket)
+            raise
+        self._record_wait(time.perf_counter() - started)
+
+    async def aacquire(self, tokens: int) -> None:
+        """
+        Async version of `acquire`, which never blocks the event loop.
+        """
+        ticket = self._enqueue()
+        started = time.perf_counter()
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_take(ticket, tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, _POLL_SECONDS))
+        except BaseException:
+            self._leave(ticket)
+            raise
+        self._record_wait(time.perf_counter() - started)
+
+    @staticmethod
+    def _record_wait(waited: float) -> None:
+        if waited >= 0.01:
+            record(llm_rate_limit_waits=1, llm_rate_limit_wait_s=waited)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """
+        Corrects the token budget once the real usage of a call is known.
+        """
+        if actual_tokens is not None:
+            with self._condition:
+                self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds back every queued call for `seconds`, e.g. after a rate-limited response.
+        """
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {"model": self.name, "queue_depth": len(self._queue),
+                    "peak_queue_depth": self.peak_queue_depth}
+
+    def call(self, messages: list[BaseMessage], send: Callable[[], T]) -> T:
+        """
+        Sends a model call within the budget, retrying rate-limited attempts with backoff.
+        """
+        estimated = _estimate_call_tokens(messages)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            self.acquire(estimated)
+            try:
+                result = send()
+            except Exception as e:  # pylint: disable=broad-except
+                self._handle_error(e, attempt)
+                continue
+            self.settle(estimated, _result_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+    async def acall(self, messages: list[BaseMessage], send: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async version of `call`.
+        """
+        estimated = _estimate_call_tokens(messages)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            await self.aacquire(estimated)
+            try:
+                result = await send()
+            except Exception as e:  # pylint: disable=broad-except
+                self._handle_error(e, attempt)
+                continue
+            self.settle(estimated, _result_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+    def _handle_error(self, error: Exception, attempt: int) -> None:
+        """
+        Re-raises errors that are not retryable; otherwise pauses the queue for the retry
+        delay, which the retry then waits out in `acquire`.
+        """
+        if not is_rate_limit_error(error):
+            raise error
+        if attempt >= LLM_MAX_RETRIES:
+            raise RateLimitError(
+                f"{self.name} is still rate limited after {LLM_MAX_RETRIES} retries: {error}") from error
+        delay = retry_delay(attempt, error)
+        record(llm_rate_limit_retries=1)
+        self.pause(delay)
+
+
+def _estimate_call_tokens(messages: list[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages) + _OUTPUT_TOKEN_ALLOWANCE
+
+
+def _result_tokens(result: Any) -> int | None:
+    generations = getattr(result, "generations", None) or []
+    usage = getattr(getattr(generations[0], "message", None), "usage_metadata", None) if generations else None
+    return usage.get("total_tokens") if usage else None
+
+
+_limiters: dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name: str) -> ModelRateLimiter:
+    """
+    Returns the process-wide limiter for a model, with the Pro or Flash quotas.
+    """
+    model_name = model_name.removeprefix("models/")
+    with _limiters_lock:
+        if model_name not in _limiters:
+            rpm, tpm = (PRO_RPM, PRO_TPM) if model_name == PRO_MODEL else (FLASH_RPM, FLASH_TPM)
+            if model_name not in (PRO_MODEL, FLASH_MODEL):
+                print(f"[Rate Limiter] No quota configured for {model_name}, using the Flash limits")
+            _limiters[model_name] = ModelRateLimiter(model_name, rpm, tpm)
+        return _limiters[model_name]
+
+
+def rate_limiter_stats() -> list[dict[str, Any]]:
+    """
+    Returns the queue depth and peak queue depth of every limiter created so far.
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
+
+
+class RateLimitedChatModel:
+    """
+    Mixin for a chat model class that sends every call through its model's limiter.
+
+    Cached responses are served by `BaseChatModel` before `_generate` is reached, so
+    they never wait for the limiter. Streams are retried only until the first chunk.
+    The chat model class must implement all four of `_generate`, `_agenerate`,
+    `_stream` and `_astream` itself, as the Gemini client does.
+    """
+
+    def _rate_limiter(self) -> ModelRateLimiter:
+        return get_rate_limiter(self.model)  # pylint: disable=no-member
+
+    def _generate(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> Any:
+        return self._rate_limiter().call(
+            messages, lambda: super(RateLimitedChatModel, self)._generate(messages, *args, **kwargs))
+
+    async def _agenerate(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> Any:
+        return await self._rate_limiter().acall(
+            messages, lambda: super(RateLimitedChatModel, self)._agenerate(messages, *args, **kwargs))
+
+    def _stream(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> Iterator[Any]:
+        limiter = self._rate_limiter()
+        chunks = limiter.call(messages, lambda: _first_chunk(
+            super(RateLimitedChatModel, self)._stream(messages, *args, **kwargs)))
+        yield from chunks
+
+    async def _astream(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        limiter = self._rate_limiter()
+        first, rest = await limiter.acall(messages, lambda: _afirst_chunk(
+            super(RateLimitedChatModel, self)._astream(messages, *args, **kwargs)))
+        if first is not None:
+            yield first
+        async for chunk in rest:
+            yield chunk
+
+
+def _first_chunk(stream: Iterator[T]) -> Iterator[T]:
+    """
+    Pulls the first chunk, so that errors raised when the request is sent surface inside
+    the limiter's retry loop, and returns an iterator over the whole stream.
+    """
+    first = next(stream, None)
+    return stream if first is None else itertools.chain([first], stream)
+
+
+async def _afirst_chunk(stream: AsyncIterator[T]) -> tuple[T | None, AsyncIterator[T]]:
+    async for chunk in stream:
+        return chunk, stream
+    return None, stream
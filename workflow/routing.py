@@ -0,0 +1,103 @@
+import re
+from typing import Any, Callable
+
+from .context_packing import split_sections
+from .metrics import record
+from .constants import MODEL_ROUTING_ENABLED, ROUTING_FLASH_MAX_INPUT_TOKENS
+
+_FENCE_LINE_PATTERN = re.compile(r"^\s*(?:```|~~~)\w*\s*$", re.MULTILINE)
+_LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+\S", re.MULTILINE)
+_NUMBERED_ITEM_PATTERN = re.compile(r"^\s*\d+[.)]\s+\S", re.MULTILINE)
+_URL_PATTERN = re.compile(r"https?://\S+")
+_CONTEXT_HEADING_PATTERN = re.compile(
+    r"product|compatib|version|setup|configur|prerequisite", re.IGNORECASE)
+
+# An answer is checked against one of these; each returns why it failed, or None
+Validator = Callable[[str], str | None]
+
+
+def choose_tier(input_tokens: int, hard: bool = False) -> str:
+    """
+    Picks the model tier to try first: Flash, unless routing is disabled or the task
+    is marked hard or its input is larger than `ROUTING_FLASH_MAX_INPUT_TOKENS`.
+    """
+    if not MODEL_ROUTING_ENABLED or hard or input_tokens > ROUTING_FLASH_MAX_INPUT_TOKENS:
+        return "pro"
+    return "flash"
+
+
+def _markdown(answer: str) -> str:
+    # Agents sometimes wrap the whole answer in a code block, which would hide its headings
+    return _FENCE_LINE_PATTERN.sub("", answer)
+
+
+def validate_integration_context(answer: str) -> str | None:
+    """
+    Checks that an integration context has the sections the context agent is asked for.
+    """
+    text = _markdown(answer)
+    headings = [section.heading for section in split_sections(text) if section.level]
+    if len(headings) < 2:
+        return "fewer than two sections"
+    if not any(_CONTEXT_HEADING_PATTERN.search(heading) for heading in headings):
+        return "no product, setup or configuration section"
+    if len(_LIST_ITEM_PATTERN.findall(text)) < 3:
+        return "fewer than three details"
+    return None
+
+
+def validate_setup_instructions(answer: str) -> str | None:
+    """
+    Checks that setup instructions have numbered Setup Steps and a Reference with URLs.
+    """
+    sections = split_sections(_markdown(answer))
+    steps = "\n".join(section.text for section in sections if "step" in section.heading.lower())
+    if not steps:
+        return "no Setup Steps section"
+    if len(_NUMBERED_ITEM_PATTERN.findall(steps)) < 3:
+        return "fewer than three setup steps"
+    references = "\n".join(section.text for section in sections if "reference" in section.heading.lower())
+    if not _URL_PATTERN.search(references):
+        return "no reference URLs"
+    return None
+
+
+def _answer(response: dict[str, Any]) -> str:
+    return response["messages"][-1].text
+
+
+def _should_escalate(node_name: str, tier: str, response: dict[str, Any], validate: Validator) -> bool:
+    record(**{f"routed_{tier}": 1})
+    if tier == "pro":
+        return False
+    problem = validate(_answer(response))
+    if problem is None:
+        return False
+    # The re-run is a Pro run too, so routed_pro counts every agent run on Pro
+    record(routed_escalations=1, routed_pro=1)
+    print(f"[Model Routing] {node_name}: Flash answer rejected ({problem}), retrying on Pro")
+    return True
+
+
+def invoke_routed(node_name: str, get_agent: Callable[[str], Any], inputs: dict[str, Any],
+                  validate: Validator, tier: str) -> dict[str, Any]:
+    """
+    Invokes the agent returned by `get_agent(tier)`. A Flash answer that fails
+    `validate` is discarded and the agent is invoked again on Pro, whose answer is
+    kept as is. Routing decisions are recorded in the run metrics.
+    """
+    response = get_agent(tier).invoke(inputs)
+    if _should_escalate(node_name, tier, response, validate):
+        response = get_agent("pro").invoke(inputs)
+    return response
+
+
+async def ainvoke_routed(node_name: str, get_agent: Callable[[str], Any], inputs: dict[str, Any],
+                         validate: Validator, tier: str) -> dict[str, Any]:
+    """
+    Async version of `invoke_routed`.
+    """
+    response = await get_agent(tier).ainvoke(inputs)
+    if _should_escalate(node_name, tier, response, validate):
+        response = await get_agent("pro").ainvoke(inputs)
+    return response
@@ -0,0 +1,131 @@
+import asyncio
+import re
+import threading
+import unicodedata
+from concurrent.futures import Future
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+from .cache import JsonDiskCache
+from .metrics import record
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# Quotes, site:, OR and exclusions change what a query means, so their word order is kept
+_OPERATOR_PATTERN = re.compile(r'"|\b[A-Za-z]+:|(?:^|\s)-\S|\bOR\b')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query so trivially different spellings share a cache entry.
+
+    Case, Unicode forms, whitespace and trailing punctuation are folded. Plain keyword
+    queries are also reduced to their sorted unique words, since word order barely
+    affects the results; queries with search operators keep their order.
+    """
+    normalized = _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+    if _OPERATOR_PATTERN.search(normalized):
+        return normalized.lower().rstrip("?.!")
+    words = [word.strip(",.;!?()") for word in normalized.lower().split(" ")]
+    return " ".join(sorted({word for word in words if word}))
+
+
+class CachedSearchTool(BaseTool):
+    """
+    A search tool wrapper with a persistent result cache and in-flight request coalescing.
+
+    Results are stored in a `JsonDiskCache` under the normalized query. Concurrent
+    calls for the same query, from any thread or event loop, wait for the one call
+    already in flight instead of issuing their own. The wrapper keeps the name,
+    description and argument schema of the wrapped tool, so agents see no difference.
+    """
+    tool: BaseTool
+    cache: JsonDiskCache | None = None
+
+    _in_flight: dict[str, Future] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def wrap(cls, tool: BaseTool, cache: JsonDiskCache | None) -> "CachedSearchTool":
+        return cls(name=tool.name, description=tool.description,
+                   args_schema=tool.args_schema, tool=tool, cache=cache)
+
+    def _key(self, query: str) -> str:
+        # Results depend on the backend and how many results it returns
+        max_results = getattr(self.tool, "max_results", "")
+        return f"{self.tool.name}:{max_results}:{normalize_query(query)}"
+
+    def _cached(self, key: str) -> Any | None:
+        record(web_searches=1)
+        value = self.cache.get(key) if self.cache is not None else None
+        if value is not None:
+            record(web_search_cache_hits=1)
+        return value
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        """
+        Returns the future for a query and whether the caller must run the search.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+            return
+        future.set_result(result)
+
+        # Empty results are often transient (rate limiting), so they are not kept
+        if result and self.cache is not None:
+            try:
+                self.cache.set(key, result)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"[Search Cache] Could not store results: {e}")
+
+    def _run(self, query: str, run_manager: Any = None) -> Any:
+        key = self._key(query)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        future, leader = self._claim(key)
+        if not leader:
+            record(web_search_coalesced=1)
+            return future.result()
+
+        record(web_search_calls=1)
+        try:
+            result = self.tool.invoke(query)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def _arun(self, query: str, run_manager: Any = None) -> Any:
+        key = self._key(query)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        future, leader = self._claim(key)
+        if not leader:
+            record(web_search_coalesced=1)
+            return await asyncio.wrap_future(future)
+
+        record(web_search_calls=1)
+        try:
+            result = await self.tool.ainvoke(query)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
@@ -24,6 +24,7 @@ class WorkflowState(TypedDict):
     final_result: Annotated[str, "The final result for the product"]
     
     urls_to_verify: Annotated[list[str], "List of URLs extracted from final result", add]
+    url_probes: Annotated[list[dict], "Reachability probe result for each extracted URL", add]
     urls_to_remove: Annotated[list[str], "List of URLs that should be removed", add]
 
 
@@ -40,5 +41,6 @@ def default_state() -> 'WorkflowState':
         "product_setup_instructions": "",
         "final_result": "",
         "urls_to_verify": [],
+        "url_probes": [],
         "urls_to_remove": [],
     }
@@ -0,0 +1,246 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+
+from .context_packing import split_sections
+from .metrics import record
+from .prompts import web_page_content_summarizer_prompt
+from .constants import (
+    SUMMARY_CHUNK_CHARS,
+    SUMMARY_MAX_CONCURRENCY,
+    SUMMARY_TOP_CHUNKS,
+)
+
+# Terms that mark setup content whatever the focus area, weighted below the focus area itself
+_SETUP_TERMS = (
+    "configure", "configuration", "setup", "enable", "server", "port", "protocol",
+    "udp", "tcp", "tls", "remote", "forward", "forwarding", "destination", "facility",
+    "severity", "format", "syslog", "logging",
+)
+_STOPWORDS = {"a", "an", "and", "the", "of", "for", "to", "in", "on", "or", "with"}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# "RELEVANT: Yes", "**SUMMARY:**", "## SETUP_INSTRUCTIONS:" ...
+_LABEL_PATTERN = re.compile(
+    r"^[ \t*#]*(RELEVANT|SUMMARY|SETUP_INSTRUCTIONS|CONFIGURATION_DETAILS)[ \t*]*:[ \t*]*",
+    re.MULTILINE)
+_EMPTY_VALUES = {"", "none", "none found", "n/a", "not specified", "no relevant content found"}
+
+_MEMO_SIZE = 256
+_memo: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _tokens(text: str) -> list[str]:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _split_long(text: str, max_chars: int) -> list[str]:
+    pieces = []
+    while len(text) > max_chars:
+        # Prefer a line break, then a sentence end, over a hard cut
+        cut = text.rfind("\n", 0, max_chars)
+        if cut < max_chars // 2:
+            cut = text.rfind(". ", 0, max_chars) + 1
+        if cut < max_chars // 2:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def chunk_page(text: str, max_chars: int = SUMMARY_CHUNK_CHARS) -> list[str]:
+    """
+    Splits page text into chunks of at most `max_chars`, at headings where possible.
+    Consecutive short sections share a chunk.
+    """
+    chunks: list[str] = []
+    current = ""
+    for section in split_sections(text):
+        for piece in _split_long(section.text, max_chars):
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def score_chunks(chunks: list[str], focus_area: str, k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """
+    Scores each chunk by BM25 against the focus area, plus generic setup terms at half weight.
+    """
+    query = Counter({token: 2.0 for token in _tokens(focus_area)})
+    for term in _SETUP_TERMS:
+        query[term] = max(query[term], 1.0)
+
+    documents = [Counter(_tokens(chunk)) for chunk in chunks]
+    lengths = [sum(document.values()) for document in documents]
+    avg_length = (sum(lengths) / len(documents)) if documents else 0.0
+    frequency: Counter[str] = Counter()
+    for document in documents:
+        frequency.update(document.keys())
+
+    scores = []
+    for document, length in zip(documents, lengths):
+        length_norm = k1 * (1 - b + b * length / (avg_length or 1))
+        score = 0.0
+        for token, weight in query.items():
+            tf = document.get(token, 0)
+            if tf:
+                idf = math.log(1 + (len(documents) - frequency[token] + 0.5) / (frequency[token] + 0.5))
+                score += weight * idf * tf * (k1 + 1) / (tf + length_norm)
+        scores.append(score)
+    return scores
+
+
+def select_chunks(chunks: list[str], focus_area: str, top_k: int = SUMMARY_TOP_CHUNKS) -> list[str]:
+    """
+    Returns the `top_k` most relevant chunks in page order, or the first chunk if none match.
+    """
+    if len(chunks) <= top_k:
+        return chunks
+    scores = score_chunks(chunks, focus_area)
+    ranked = sorted(range(len(chunks)), key=lambda idx: (-scores[idx], idx))[:top_k]
+    chosen = [idx for idx in ranked if scores[idx] > 0] or [0]
+    return [chunks[idx] for idx in sorted(chosen)]
+
+
+def parse_summary(result_text: str) -> dict[str, Any]:
+    """
+    Parses the summarizer's RELEVANT / SUMMARY / SETUP_INSTRUCTIONS / CONFIGURATION_DETAILS reply.
+    """
+    sections: dict[str, str] = {}
+    matches = list(_LABEL_PATTERN.finditer(result_text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(result_text)
+        sections.setdefault(match.group(1), result_text[match.end():end].strip())
+
+    return {
+        "has_relevant_content": sections.get("RELEVANT", "").lower().startswith("yes"),
+        "summary": sections.get("SUMMARY") or "No summary available",
+        "setup_instructions": sections.get("SETUP_INSTRUCTIONS") or "None found",
+        "configuration_details": sections.get("CONFIGURATION_DETAILS") or "None found",
+        "full_response": result_text
+    }
+
+
+def _is_empty(value: str) -> bool:
+    return value.strip().strip("[]").rstrip(".").lower() in _EMPTY_VALUES
+
+
+def _unique(values: list[str]) -> list[str]:
+    return list(dict.fromkeys(value.strip() for value in values if not _is_empty(value)))
+
+
+def merge_summaries(parsed: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Merges the summaries of several chunks of one page, keeping only the relevant ones.
+    """
+    relevant = [summary for summary in parsed if summary["has_relevant_content"]] or parsed[:1]
+    config_lines = _unique([line for summary in relevant
+                            for line in summary["configuration_details"].splitlines()])
+    return {
+        "has_relevant_content": any(summary["has_relevant_content"] for summary in parsed),
+        "summary": " ".join(_unique([s["summary"] for s in relevant])) or "No summary available",
+        "setup_instructions": "\n\n".join(_unique([s["setup_instructions"] for s in relevant])) or "None found",
+        "configuration_details": "\n".join(config_lines) or "None found",
+        "full_response": "\n\n---\n\n".join(summary["full_response"] for summary in parsed)
+    }
+
+
+def _memo_key(page_content: str, focus_area: str) -> str:
+    digest = hashlib.sha256(page_content.encode("utf-8")).hexdigest()
+    return f"{digest}:{focus_area.strip().lower()}"
+
+
+def _memo_get(key: str) -> dict[str, Any] | None:
+    with _memo_lock:
+        summary = _memo.get(key)
+        if summary is not None:
+            _memo.move_to_end(key)
+    if summary is not None:
+        record(summary_memo_hits=1)
+        return dict(summary)
+    return None
+
+
+def _memo_set(key: str, summary: dict[str, Any]) -> None:
+    with _memo_lock:
+        _memo[key] = dict(summary)
+        _memo.move_to_end(key)
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def _map_inputs(page_content: str, focus_area: str) -> list[dict[str, str]]:
+    chunks = chunk_page(page_content)
+    selected = select_chunks(chunks, focus_area)
+    record(summary_chunks=len(chunks), summary_chunks_summarized=len(selected))
+    return [{"content_to_analyze": chunk, "focus_area": focus_area} for chunk in selected]
+
+
+def _reduce(results: list[Any]) -> dict[str, Any]:
+    replies = [result for result in results if isinstance(result, str)]
+    if not replies:
+        # Every chunk failed; surface the first error like a single call would
+        raise results[0]
+    return merge_summaries([parse_summary(reply) for reply in replies])
+
+
+def summarize_page(page_content: str, focus_area: str, llm: BaseChatModel) -> dict[str, Any]:
+    """
+    Summarizes a page for a focus area with a map-reduce over its most relevant chunks.
+
+    The page is split at headings, the chunks are ranked by BM25 against the focus
+    area, and only the top `SUMMARY_TOP_CHUNKS` are summarized, concurrently. The
+    results are merged without another LLM call and memoized by page hash and focus area.
+    """
+    key = _memo_key(page_content, focus_area)
+    cached = _memo_get(key)
+    if cached is not None:
+        return cached
+
+    inputs = _map_inputs(page_content, focus_area)
+    if not inputs:
+        return parse_summary("RELEVANT: No")
+
+    chain = web_page_content_summarizer_prompt | llm | StrOutputParser()
+    results = chain.batch(inputs, config={"max_concurrency": SUMMARY_MAX_CONCURRENCY},
+                          return_exceptions=True)
+    summary = _reduce(results)
+    if all(isinstance(result, str) for result in results):
+        _memo_set(key, summary)
+    return summary
+
+
+async def asummarize_page(page_content: str, focus_area: str, llm: BaseChatModel) -> dict[str, Any]:
+    """
+    Async version of `summarize_page`.
+    """
+    key = _memo_key(page_content, focus_area)
+    cached = _memo_get(key)
+    if cached is not None:
+        return cached
+
+    inputs = _map_inputs(page_content, focus_area)
+    if not inputs:
+        return parse_summary("RELEVANT: No")
+
+    chain = web_page_content_summarizer_prompt | llm | StrOutputParser()
+    results = await chain.abatch(inputs, config={"max_concurrency": SUMMARY_MAX_CONCURRENCY},
+                                 return_exceptions=True)
+    summary = _reduce(results)
+    if all(isinstance(result, str) for result in results):
+        _memo_set(key, summary)
+    return summary
@@ -1,16 +1,50 @@
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_core.tools import tool
-from langchain_core.output_parsers import StrOutputParser
+import threading
 
-from .prompts import web_page_content_summarizer_prompt
-from .constants import DEBUG, flash_llm
-from .utils import fetch_url_content
+from langchain_core.tools import BaseTool, StructuredTool
 
-web_search_tool = DuckDuckGoSearchResults(max_results=10, verbose=DEBUG)
+from .cache import get_search_cache
+from .constants import DEBUG
+from .models import get_flash_llm
+from .search import CachedSearchTool
+from .summarizer import summarize_page, asummarize_page
+from .utils import fetch_url_content, async_fetch_url_content
 
+_search_backend: BaseTool | None = None
+_web_search_tool: BaseTool | None = None
+_web_search_tool_lock = threading.Lock()
 
-@tool
-def fetch_url_content_tool(url: str) -> dict[str, int | str]:
+
+def get_web_search_tool() -> BaseTool:
+    """
+    Returns the process-wide web search tool, creating it on first use.
+
+    Searches go through a `CachedSearchTool`, so repeated and concurrent identical
+    queries from any agent or product cost a single search.
+    """
+    global _search_backend, _web_search_tool  # pylint: disable=global-statement
+    with _web_search_tool_lock:
+        if _web_search_tool is None:
+            if _search_backend is None:
+                # Deferred: langchain_community pulls in a large dependency tree
+                from langchain_community.tools import DuckDuckGoSearchResults  # pylint: disable=import-outside-toplevel
+
+                _search_backend = DuckDuckGoSearchResults(max_results=10, verbose=DEBUG)
+            _web_search_tool = CachedSearchTool.wrap(_search_backend, get_search_cache())
+        return _web_search_tool
+
+
+def set_web_search_tool(tool: BaseTool | None) -> None:
+    """
+    Replaces the search backend behind `get_web_search_tool`, e.g. with a stub in
+    benchmarks. Passing None restores the default on its next use.
+    """
+    global _search_backend, _web_search_tool  # pylint: disable=global-statement
+    with _web_search_tool_lock:
+        _search_backend = tool
+        _web_search_tool = None
+
+
+def _fetch_url_content(url: str) -> dict[str, int | str]:
     """
     Fetch the content of a URL using a headless browser to handle JavaScript-rendered content.
 
@@ -23,8 +57,19 @@ def fetch_url_content_tool(url: str) -> dict[str, int | str]:
     return fetch_url_content(url)
 
 
-@tool
-def summarize_for_logging_setup(page_content: str, focus_area: str = "logging and syslog configuration") -> dict[str, str]:
+async def _afetch_url_content(url: str) -> dict[str, int | str]:
+    return await async_fetch_url_content(url)
+
+
+# Both tools carry a coroutine so agents driven with `ainvoke` never block a thread on them
+fetch_url_content_tool = StructuredTool.from_function(
+    func=_fetch_url_content,
+    coroutine=_afetch_url_content,
+    name="fetch_url_content_tool",
+)
+
+
+def _summarize_for_logging_setup(page_content: str, focus_area: str = "logging and syslog configuration") -> dict[str, str]:
     """
     Uses an LLM to intelligently extract and summarize relevant information from vendor documentation.
 
@@ -44,58 +89,30 @@ def summarize_for_logging_setup(page_content: str, focus_area: str = "logging an
     """
 
     try:
-        # Truncate very long content to fit in context
-        max_length = 40000
-        content_to_analyze = page_content[:max_length]
-        if len(page_content) > max_length:
-            content_to_analyze += "\n\n... (content truncated for analysis)"
-
-        chain = web_page_content_summarizer_prompt | flash_llm | StrOutputParser()
-
-        result_text = chain.invoke(
-            {"content_to_analyze": content_to_analyze, "focus_area": focus_area}
-        )
-
-        # Parse the response
-        has_relevant = "RELEVANT: Yes" in result_text or "RELEVANT: yes" in result_text
-
-        # Extract sections
-        summary = ""
-        setup_instructions = ""
-        config_details = ""
-
-        if "SUMMARY:" in result_text:
-            parts = result_text.split("SUMMARY:")
-            if len(parts) > 1:
-                summary_section = parts[1].split(
-                    "SETUP_INSTRUCTIONS:")[0].strip()
-                summary = summary_section
-
-        if "SETUP_INSTRUCTIONS:" in result_text:
-            parts = result_text.split("SETUP_INSTRUCTIONS:")
-            if len(parts) > 1:
-                setup_section = parts[1].split(
-                    "CONFIGURATION_DETAILS:")[0].strip()
-                setup_instructions = setup_section
-
-        if "CONFIGURATION_DETAILS:" in result_text:
-            parts = result_text.split("CONFIGURATION_DETAILS:")
-            if len(parts) > 1:
-                config_details = parts[1].strip()
-
-        return {
-            "has_relevant_content": has_relevant,
-            "summary": summary if summary else "No summary available",
-            "setup_instructions": setup_instructions if setup_instructions else "None found",
-            "configuration_details": config_details if config_details else "None found",
-            "full_response": result_text
-        }
+        return summarize_page(page_content, focus_area, get_flash_llm())
+    except (ValueError, AttributeError, TypeError) as e:
+        return _summary_error(e)
+
 
+async def _asummarize_for_logging_setup(page_content: str, focus_area: str = "logging and syslog configuration") -> dict[str, str]:
+    try:
+        return await asummarize_page(page_content, focus_area, get_flash_llm())
     except (ValueError, AttributeError, TypeError) as e:
-        return {
-            "has_relevant_content": False,
-            "summary": f"Error analyzing content: {str(e)}",
-            "setup_instructions": "Error during analysis",
-            "configuration_details": "Error during analysis",
-            "full_response": ""
-        }
+        return _summary_error(e)
+
+
+summarize_for_logging_setup = StructuredTool.from_function(
+    func=_summarize_for_logging_setup,
+    coroutine=_asummarize_for_logging_setup,
+    name="summarize_for_logging_setup",
+)
+
+
+def _summary_error(e: Exception) -> dict[str, str]:
+    return {
+        "has_relevant_content": False,
+        "summary": f"Error analyzing content: {str(e)}",
+        "setup_instructions": "Error during analysis",
+        "configuration_details": "Error during analysis",
+        "full_response": ""
+    }
@@ -1,11 +1,37 @@
+import asyncio
+import json
 import re
+import time
 from typing import Any
 from functools import partial
+from urllib.parse import urlparse, urlsplit, urlunsplit
 
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableLambda
 
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import requests
+
+from .browser import get_browser_pool
+from .cache import get_page_cache
+from .metrics import record, record_fetch
+from .markdown_index import UrlOccurrence, get_markdown_url_index
+from .prompts import url_batch_evaluation_prompt
+from .rate_limit import RateLimitError
+from .http_client import get_http_session
+from .constants import (
+    FETCH_CONCURRENCY,
+    FETCH_PER_HOST_CONCURRENCY,
+    FETCH_DEADLINE_SECONDS,
+    FETCH_TIMEOUT_MS,
+    FETCH_HTTP_TIMEOUT_SECONDS,
+    FETCH_MIN_TEXT_CHARS,
+    FETCH_SHELL_TEXT_CHARS,
+    FETCH_OFFLINE,
+    FETCH_PROBE_TIMEOUT_SECONDS,
+    URL_EVAL_BATCH_SIZE,
+)
+
+_RATE_LIMITED_REASON = "Not evaluated, LLM rate limited after retries, kept by default"
 
 
 def extract_urls_from_markdown(markdown_content: str) -> list[str]:
@@ -16,32 +42,103 @@ def extract_urls_from_markdown(markdown_content: str) -> list[str]:
         markdown_content: The markdown content to extract URLs from.
 
     Returns:
-        list[str]: List of unique URLs found in the content.
+        list[str]: List of unique URLs found in the content, in order of first appearance.
     """
-    # Pattern to match markdown links [text](url) and bare URLs
-    markdown_link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-    bare_url_pattern = r'https?://[^\s\)]+'
-
-    urls = set()
-
-    # Extract markdown links
-    markdown_links: list[str] = re.findall(
-        markdown_link_pattern, markdown_content)
-    for _, url in markdown_links:
-        if url.startswith(('http', 'https')):
-            urls.add(url.strip())
-
-    # Extract bare URLs (not already captured in markdown links)
-    bare_urls: list[str] = re.findall(bare_url_pattern, markdown_content)
-    for url in bare_urls:
-        # Only add if not already in markdown link format
-        if url not in [link for _, link in markdown_links]:
-            urls.add(url.strip())
-
-    return list(urls)
+    return get_markdown_url_index(markdown_content).urls
+
+
+# The marker may end the line, e.g. once a bare URL item has been emptied and stripped
+_LIST_ITEM_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+[.)])(?:\s+|$)')
+_WORD_PATTERN = re.compile(r'\w+')
+# A list item reduced to its label once the link is gone, e.g. "- **Docs**:"
+_LABEL_ONLY_PATTERN = re.compile(r'^[\s*_]*[^:\n]{0,40}:[\s*_]*$')
+_OPEN_BRACKET_PATTERN = re.compile(r'([(<])\s*$')
+_CLOSING_BRACKETS = {'(': ')', '<': '>'}
+# Pages are kept whole; only this much of one goes into a URL evaluation prompt
+_CONTENT_PREVIEW_CHARS = 1000
+
+
+def _replace_occurrences(line: str, occurrences: list[UrlOccurrence], keep_link_text: bool) -> str:
+    parts = []
+    position = 0
+    for occurrence in occurrences:
+        before = line[position:occurrence.start]
+        end = occurrence.end
+        if keep_link_text and occurrence.link_text is not None:
+            parts.extend([before, occurrence.link_text])
+            position = end
+            continue
+
+        # Drop the brackets around a removed bare URL, e.g. "(https://...)", and nothing else
+        opening = _OPEN_BRACKET_PATTERN.search(before)
+        following = line[end:]
+        closing = _CLOSING_BRACKETS[opening.group(1)] if opening else None
+        if closing and following.lstrip().startswith(closing):
+            end += len(following) - len(following.lstrip()) + 1
+            before = before[:opening.start()]
+            if not line[end:end + 1].strip() or line[end] in '.,;:!?':
+                before = before.rstrip()
+        parts.append(before)
+        position = end
+    parts.append(line[position:])
+    return ''.join(parts)
+
+
+def remove_urls_from_markdown(markdown_content: str, urls: list[str], mode: str = "remove") -> str:
+    """
+    Remove URLs from markdown content without an LLM, in a single pass over the lines.
 
+    Args:
+        markdown_content: The markdown content to clean.
+        urls: The URLs to remove.
+        mode: "remove" drops lines that are nothing but the link and list items left
+            with only a label, and unwraps links elsewhere, including list items with
+            text of their own, to their text. "unwrap" always keeps the surrounding
+            text and only replaces links with their text.
 
-def evaluate_single_url(url: str, markdown_content: str, integration_name: str, llm: Any) -> dict[str, Any]:
+    Returns:
+        str: The markdown content with the URLs removed.
+    """
+    to_remove = {url.strip() for url in urls}
+    if not to_remove:
+        return markdown_content
+
+    index = get_markdown_url_index(markdown_content)
+    by_line = index.occurrences_by_line(to_remove)
+    if not by_line:
+        return markdown_content
+
+    cleaned_lines = []
+    for line_idx, line in enumerate(index.lines):
+        occurrences = by_line.get(line_idx)
+        if not occurrences:
+            cleaned_lines.append(line)
+            continue
+
+        if mode == "remove":
+            # Whatever is left once the links are gone entirely, e.g. "- **Docs**:"
+            remainder = _replace_occurrences(
+                line, occurrences, keep_link_text=False)
+            remainder = _LIST_ITEM_PATTERN.sub('', remainder)
+            if not _WORD_PATTERN.search(remainder):
+                continue
+            # List items keep their text, e.g. numbered setup steps, unless only a label is left
+            if _LIST_ITEM_PATTERN.match(line) and _LABEL_ONLY_PATTERN.match(remainder):
+                continue
+
+        unwrapped = _replace_occurrences(line, occurrences, keep_link_text=True)
+
+        # Tidy up doubled spaces left by removed bare URLs
+        unwrapped = re.sub(r'(?<=\S) {2,}', ' ', unwrapped).rstrip()
+        if not _LIST_ITEM_PATTERN.sub('', unwrapped).strip():
+            continue
+        cleaned_lines.append(unwrapped)
+
+    return '\n'.join(cleaned_lines)
+
+
+def evaluate_single_url(url: str, markdown_content: str, integration_name: str, llm: Any,
+                        url_info: dict[str, Any] | None = None) -> dict[str, Any]:
     """
     Evaluate a single URL to determine if it should be kept or removed.
     This function is designed to be called in parallel.
@@ -51,32 +148,26 @@ def evaluate_single_url(url: str, markdown_content: str, integration_name: str,
         markdown_content: The full markdown content.
         integration_name: The name of the integration.
         llm: The language model to use for evaluation.
+        url_info: Already fetched content for the URL. Fetched on demand when omitted.
 
     Returns:
         dict with 'url', 'should_remove', 'reason', 'status_code', 'section_type'
     """
     # Extract context
-    context_info = _extract_url_context_impl(markdown_content, url)
+    context_info = get_markdown_url_index(markdown_content).context(url)
     section_type = context_info.get('section_type', 'other')
     section = context_info.get('section', 'Unknown')
 
-    # Fetch URL content (sync version for now, we'll call this from async wrapper)
-    url_info = fetch_url_content(url)
+    # Fetch URL content unless the caller already fetched it
+    if url_info is None:
+        url_info = fetch_url_content(url)
     status_code = url_info.get('status_code', 0)
     content = url_info.get('content', '')
 
     # Determine if URL should be removed based on validation rules
-    should_remove = False
-    reason = ""
-
-    # Rule 1: Always remove if status is not 200
-    if status_code != 200:
-        should_remove = True
-        reason = f"Status code {status_code} (not 200)"
-    # Rule 2: Always keep elastic.co if status is 200
-    elif 'elastic.co' in url:
-        should_remove = False
-        reason = "elastic.co domain with status 200"
+    verdict = _apply_url_rules(url, status_code)
+    if verdict is not None:
+        should_remove, reason = verdict
     # Rule 3: Section-specific validation
     else:
         # Use LLM to evaluate content relevance
@@ -88,8 +179,8 @@ def evaluate_single_url(url: str, markdown_content: str, integration_name: str,
         URL: {url}
         Status: {status_code}
         
-        Content preview (first 1000 chars):
-        {content[:1000]}
+        Content preview (first {_CONTENT_PREVIEW_CHARS} chars):
+        {content[:_CONTENT_PREVIEW_CHARS]}
         
         Validation criteria for {section_type}:
         - product_info: Content should be about the product (general info, features, overview)
@@ -112,6 +203,11 @@ def evaluate_single_url(url: str, markdown_content: str, integration_name: str,
             else:
                 should_remove = False
                 reason = answer.replace('KEEP', '').strip(' :-')
+        except RateLimitError as e:
+            # Not a judgement on the URL; keep it, but say why it was not checked
+            record(url_evaluations_rate_limited=1)
+            should_remove = False
+            reason = f"{_RATE_LIMITED_REASON}: {str(e)}"
         except (RuntimeError, ValueError, AttributeError) as e:
             # If LLM fails, use conservative approach - keep the URL
             should_remove = False
@@ -127,191 +223,739 @@ def evaluate_single_url(url: str, markdown_content: str, integration_name: str,
     }
 
 
-def evaluate_urls_parallel(urls: list[str], markdown_content: str, integration_name: str, llm: Any, max_concurrent: int = 5) -> list[dict[str, Any]]:
+def _rate_limited_verdicts(items: list[dict[str, Any]], error: RateLimitError) -> dict[str, tuple[bool, str]]:
+    """
+    Keeps every URL of a batch that could not be judged because the model stayed rate
+    limited. Returning verdicts avoids retrying each URL alone against the same quota.
+    """
+    print(f"[URL Verification] Batched evaluation rate limited: {error}")
+    record(url_evaluations_rate_limited=len(items))
+    return {item["url"]: (False, _RATE_LIMITED_REASON) for item in items}
+
+
+def _apply_url_rules(url: str, status_code: int) -> tuple[bool, str] | None:
+    """
+    Apply the validation rules that do not need an LLM.
+
+    Returns:
+        tuple[bool, str] | None: `(should_remove, reason)`, or None if the LLM has to decide.
     """
-    Evaluate multiple URLs in parallel using LangChain's batch execution.
+    # Rule 1: Always remove if status is not 200
+    if status_code != 200:
+        return True, f"Status code {status_code} (not 200)"
+    # Rule 2: Always keep elastic.co if status is 200
+    if 'elastic.co' in url:
+        return False, "elastic.co domain with status 200"
+    return None
+
+
+def _parse_batch_verdicts(response_text: str, item_count: int) -> dict[int, tuple[bool, str]]:
+    """
+    Parse the JSON verdict list returned for a batched URL evaluation.
+
+    Returns:
+        dict mapping the 1-based item id to `(should_remove, reason)`. Items whose
+        verdict is missing or malformed are left out.
+    """
+    start = response_text.find('[')
+    end = response_text.rfind(']')
+    if start == -1 or end < start:
+        return {}
+
+    try:
+        verdicts = json.loads(response_text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    parsed = {}
+    for verdict in verdicts if isinstance(verdicts, list) else []:
+        if not isinstance(verdict, dict):
+            continue
+        item_id = verdict.get("id")
+        decision = str(verdict.get("verdict", "")).strip().upper()
+        if not isinstance(item_id, int) or not 1 <= item_id <= item_count:
+            continue
+        if decision not in ("KEEP", "REMOVE"):
+            continue
+        parsed[item_id] = (decision == "REMOVE",
+                           str(verdict.get("reason", "")).strip())
+    return parsed
+
+
+def _format_url_batch(items: list[dict[str, Any]]) -> str:
+    return "\n\n".join(
+        f"[{idx}] URL: {item['url']}\n"
+        f"Section: {item['section']} (Type: {item['section_type']})\n"
+        f"Status: {item['status_code']}\n"
+        f"Content preview (first {_CONTENT_PREVIEW_CHARS} chars):\n{item['content'][:_CONTENT_PREVIEW_CHARS]}"
+        for idx, item in enumerate(items, start=1)
+    )
+
+
+def evaluate_url_batch(items: list[dict[str, Any]], integration_name: str, llm: Any) -> dict[str, tuple[bool, str]]:
+    """
+    Judge several URLs with a single LLM call.
 
     Args:
-        urls: List of URLs to evaluate.
-        markdown_content: The full markdown content.
+        items: Dicts with 'url', 'section', 'section_type', 'status_code' and 'content'.
         integration_name: The name of the integration.
         llm: The language model to use for evaluation.
-        max_concurrent: Maximum number of concurrent evaluations.
 
     Returns:
-        List of evaluation results for each URL.
+        dict mapping each URL whose verdict could be parsed to `(should_remove, reason)`.
     """
-    if not urls:
-        return []
+    chain = url_batch_evaluation_prompt | llm | StrOutputParser()
+    try:
+        response_text = chain.invoke({
+            "integration_name": integration_name,
+            "urls_block": _format_url_batch(items),
+        })
+    except RateLimitError as e:
+        return _rate_limited_verdicts(items, e)
+    except (RuntimeError, ValueError, AttributeError) as e:
+        print(f"[URL Verification] Batched evaluation failed: {e}")
+        return {}
+
+    verdicts = _parse_batch_verdicts(response_text, len(items))
+    return {items[item_id - 1]["url"]: verdict for item_id, verdict in verdicts.items()}
+
+
+async def aevaluate_url_batch(items: list[dict[str, Any]], integration_name: str, llm: Any) -> dict[str, tuple[bool, str]]:
+    """
+    Async version of `evaluate_url_batch`.
+    """
+    chain = url_batch_evaluation_prompt | llm | StrOutputParser()
+    try:
+        response_text = await chain.ainvoke({
+            "integration_name": integration_name,
+            "urls_block": _format_url_batch(items),
+        })
+    except RateLimitError as e:
+        return _rate_limited_verdicts(items, e)
+    except (RuntimeError, ValueError, AttributeError) as e:
+        print(f"[URL Verification] Batched evaluation failed: {e}")
+        return {}
+
+    verdicts = _parse_batch_verdicts(response_text, len(items))
+    return {items[item_id - 1]["url"]: verdict for item_id, verdict in verdicts.items()}
+
+
+def _prepare_url_evaluation(urls: list[str], markdown_content: str,
+                            fetched: dict[str, dict[str, Any]]) -> tuple[dict[str, dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Settles what the validation rules can decide and returns the results so far,
+    plus the items that still need an LLM verdict.
+    """
+    index = get_markdown_url_index(markdown_content)
+    results: dict[str, dict[str, Any]] = {}
+    pending: list[dict[str, Any]] = []
+    for url in urls:
+        context_info = index.context(url)
+        url_info = fetched.get(url, {})
+        item = {
+            "url": url,
+            "section": context_info.get('section', 'Unknown'),
+            "section_type": context_info.get('section_type', 'other'),
+            "status_code": url_info.get('status_code', 0),
+            "content": url_info.get('content', ''),
+        }
+
+        verdict = _apply_url_rules(url, item["status_code"])
+        if verdict is None:
+            pending.append(item)
+        else:
+            results[url] = _url_evaluation_result(item, *verdict)
+    return results, pending
+
+
+def _split_batches(pending: list[dict[str, Any]], batch_size: int) -> list[list[dict[str, Any]]]:
+    return [pending[i:i + max(batch_size, 1)]
+            for i in range(0, len(pending), max(batch_size, 1))]
+
+
+def _merge_batch_verdicts(results: dict[str, dict[str, Any]], batches: list[list[dict[str, Any]]],
+                          batch_verdicts: list[dict[str, tuple[bool, str]]]) -> list[dict[str, Any]]:
+    """
+    Adds the parsed batch verdicts to `results` and returns the items left without one.
+    """
+    unparsed: list[dict[str, Any]] = []
+    for batch, verdicts in zip(batches, batch_verdicts):
+        for item in batch:
+            if item["url"] in verdicts:
+                results[item["url"]] = _url_evaluation_result(
+                    item, *verdicts[item["url"]])
+            else:
+                unparsed.append(item)
+    return unparsed
 
-    # Create a partial function with fixed parameters
+
+def _single_url_evaluator(markdown_content: str, integration_name: str, llm: Any,
+                          fetched: dict[str, dict[str, Any]]) -> RunnableLambda:
     evaluate_fn = partial(
         evaluate_single_url,
         markdown_content=markdown_content,
         integration_name=integration_name,
         llm=llm
     )
+    return RunnableLambda(
+        lambda item: evaluate_fn(item["url"], url_info=fetched.get(item["url"])))
 
-    # Wrap in RunnableLambda for LangChain's parallel execution
-    url_evaluator = RunnableLambda(evaluate_fn)
-
-    # Use LangChain's batch() with max_concurrency for parallel execution
-    # This handles threading/parallelism internally
-    results = url_evaluator.batch(
-        urls,
-        config={"max_concurrency": max_concurrent}
-    )
 
-    # Filter out any failed results
-    valid_results = []
-    for result in results:
+def _merge_single_results(results: dict[str, dict[str, Any]], single_results: list[Any]) -> None:
+    for result in single_results:
         if isinstance(result, dict) and "url" in result:
-            valid_results.append(result)
+            results[result["url"]] = result
         elif isinstance(result, Exception):
             print(f"Error evaluating URL: {result}")
 
-    return valid_results
 
+def evaluate_urls_parallel(urls: list[str], markdown_content: str, integration_name: str, llm: Any,
+                           max_concurrent: int = 5, batch_size: int = URL_EVAL_BATCH_SIZE) -> list[dict[str, Any]]:
+    """
+    Evaluate multiple URLs in parallel.
+
+    All pages are fetched up front by the async fetch engine. URLs that the validation
+    rules cannot settle are packed `batch_size` at a time into single LLM calls, which
+    run using LangChain's batch execution. Only URLs whose batched verdict cannot be
+    parsed fall back to one LLM call each.
 
-def _extract_url_context_impl(markdown_content: str, url: str) -> dict[str, str]:
+    Args:
+        urls: List of URLs to evaluate.
+        markdown_content: The full markdown content.
+        integration_name: The name of the integration.
+        llm: The language model to use for evaluation.
+        max_concurrent: Maximum number of concurrent LLM calls.
+        batch_size: Number of URLs judged per LLM call.
+
+    Returns:
+        List of evaluation results for each URL.
     """
-    Internal implementation for extracting URL context.
-    Not decorated with @tool so it can be called directly.
+    if not urls:
+        return []
+
+    # Fetch every page on the shared browser's event loop
+    fetched = {info["url"]: info for info in fetch_many(urls)}
+    results, pending = _prepare_url_evaluation(urls, markdown_content, fetched)
+
+    # Judge the remaining URLs several at a time
+    batches = _split_batches(pending, batch_size)
+    unparsed: list[dict[str, Any]] = []
+    if batches:
+        batch_evaluator = RunnableLambda(partial(
+            evaluate_url_batch,
+            integration_name=integration_name,
+            llm=llm
+        ))
+        batch_verdicts = batch_evaluator.batch(
+            batches,
+            config={"max_concurrency": max_concurrent}
+        )
+        unparsed = _merge_batch_verdicts(results, batches, batch_verdicts)
+
+    # Fall back to one LLM call per URL for verdicts that could not be parsed
+    if unparsed:
+        url_evaluator = _single_url_evaluator(
+            markdown_content, integration_name, llm, fetched)
+        _merge_single_results(results, url_evaluator.batch(
+            unparsed, config={"max_concurrency": max_concurrent}))
+
+    return [results[url] for url in urls if url in results]
+
+
+async def async_evaluate_urls(urls: list[str], markdown_content: str, integration_name: str, llm: Any,
+                              max_concurrent: int = 5, batch_size: int = URL_EVAL_BATCH_SIZE) -> list[dict[str, Any]]:
     """
-    try:
-        lines = markdown_content.split('\n')
-        url_line_idx = -1
+    Async version of `evaluate_urls_parallel`.
 
-        # Find the line containing the URL
-        for idx, line in enumerate(lines):
-            if url in line:
-                url_line_idx = idx
-                break
+    Pages are awaited from the fetch engine and the batched LLM calls run concurrently
+    on the caller's event loop with `ainvoke`, so no thread is held while they are in flight.
 
-        if url_line_idx == -1:
-            return {
-                "url": url,
-                "section": "Unknown",
-                "context": "URL not found in content"
-            }
+    Args:
+        urls: List of URLs to evaluate.
+        markdown_content: The full markdown content.
+        integration_name: The name of the integration.
+        llm: The language model to use for evaluation.
+        max_concurrent: Maximum number of concurrent LLM calls.
+        batch_size: Number of URLs judged per LLM call.
+
+    Returns:
+        List of evaluation results for each URL.
+    """
+    if not urls:
+        return []
 
-        # Find the current section by looking backwards for the nearest heading
-        current_section = "Unknown"
-
-        for idx in range(url_line_idx, -1, -1):
-            line = lines[idx].strip()
-            if line.startswith('#'):
-                # Found the section heading
-                current_section = line.lstrip('#').strip()
-                break
-
-        # Extract surrounding context (5 lines before and after)
-        context_start = max(0, url_line_idx - 5)
-        context_end = min(len(lines), url_line_idx + 6)
-        context = '\n'.join(lines[context_start:context_end])
-
-        # Determine section type
-        section_lower = current_section.lower()
-        section_type = "other"
-
-        if any(keyword in section_lower for keyword in ['intro', 'overview', 'about', 'service info', 'common use', 'compatibility']):
-            section_type = "product_info"
-        elif any(keyword in section_lower for keyword in ['setup', 'configuration', 'install', 'set up', 'vendor set up', 'kibana set up']):
-            section_type = "setup"
-        elif any(keyword in section_lower for keyword in ['documentation', 'reference', 'resources', 'documentation sites']):
-            section_type = "documentation"
-        elif any(keyword in section_lower for keyword in ['troubleshoot', 'error', 'issue']):
-            section_type = "troubleshooting"
+    fetched = {info["url"]: info for info in await async_fetch_many(urls)}
+    results, pending = _prepare_url_evaluation(urls, markdown_content, fetched)
+
+    batches = _split_batches(pending, batch_size)
+    unparsed: list[dict[str, Any]] = []
+    if batches:
+        batch_evaluator = RunnableLambda(partial(
+            aevaluate_url_batch,
+            integration_name=integration_name,
+            llm=llm
+        ))
+        batch_verdicts = await batch_evaluator.abatch(
+            batches,
+            config={"max_concurrency": max_concurrent}
+        )
+        unparsed = _merge_batch_verdicts(results, batches, batch_verdicts)
+
+    # The per-URL fallback is rare; it runs in the default executor
+    if unparsed:
+        url_evaluator = _single_url_evaluator(
+            markdown_content, integration_name, llm, fetched)
+        _merge_single_results(results, await url_evaluator.abatch(
+            unparsed, config={"max_concurrency": max_concurrent}))
+
+    return [results[url] for url in urls if url in results]
+
+
+def _url_evaluation_result(item: dict[str, Any], should_remove: bool, reason: str) -> dict[str, Any]:
+    return {
+        "url": item["url"],
+        "should_remove": should_remove,
+        "reason": reason,
+        "status_code": item["status_code"],
+        "section_type": item["section_type"],
+        "section": item["section"]
+    }
 
-        return {
-            "url": url,
-            "section": current_section,
-            "section_type": section_type,
-            "context": context
-        }
 
-    except (ValueError, IndexError, AttributeError) as e:
-        # Handle parsing errors
+def probe_url(url: str) -> dict[str, Any]:
+    """
+    Cheaply check whether a URL is reachable, without downloading or rendering the page.
+
+    Sends a HEAD request and falls back to a one-byte ranged GET for servers that
+    reject HEAD. Only definitive failures (404/410, DNS, TLS and connection errors)
+    mark a URL as unreachable; anything else is left for the full evaluation.
+
+    Args:
+        url: The URL to probe.
+
+    Returns:
+        dict with 'url', 'reachable', 'status_code', 'latency_ms', 'reason'
+    """
+    start = time.perf_counter()
+
+    def _result(reachable: bool, status_code: int, reason: str) -> dict[str, Any]:
         return {
             "url": url,
-            "section": "Unknown",
-            "section_type": "other",
-            "context": f"Error extracting context: {str(e)}"
+            "reachable": reachable,
+            "status_code": status_code,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "reason": reason
         }
 
+    if FETCH_OFFLINE:
+        return _result(True, 0, "Offline mode, not probed")
 
-def fetch_url_content(url: str) -> dict[str, int | str]:
+    record(probes=1)
+
+    # A fresh cached fetch already tells us the status code
+    cache = get_page_cache()
+    entry = cache.lookup(normalize_url(url)) if cache else None
+    if entry is not None and not entry.expired:
+        status_code = entry.value["result"]["status_code"]
+        return _result(status_code not in (404, 410), status_code, "Page cache")
+
+    session = get_http_session()
+    try:
+        response = session.head(
+            url, timeout=FETCH_PROBE_TIMEOUT_SECONDS, allow_redirects=True)
+        if response.status_code in (400, 403, 405, 501):
+            # Some servers reject HEAD outright; ask for a single byte instead
+            with session.get(url, headers={"Range": "bytes=0-0"}, stream=True,
+                             timeout=FETCH_PROBE_TIMEOUT_SECONDS, allow_redirects=True) as response:
+                pass
+    except requests.exceptions.SSLError as e:
+        return _result(False, 0, f"TLS error: {e}")
+    except requests.exceptions.ConnectionError as e:
+        return _result(False, 0, f"Connection error: {e}")
+    except requests.RequestException as e:
+        # Timeouts and protocol quirks are not proof of a dead link
+        return _result(True, 0, f"Probe inconclusive: {e}")
+
+    if response.status_code in (404, 410):
+        return _result(False, response.status_code, f"Status code {response.status_code}")
+    return _result(True, response.status_code, f"Status code {response.status_code}")
+
+
+def probe_urls(urls: list[str], max_concurrent: int = FETCH_CONCURRENCY) -> list[dict[str, Any]]:
     """
-    Fetch the content of a URL using a headless browser to handle JavaScript-rendered content.
+    Probe multiple URLs in parallel using LangChain's batch execution.
 
     Args:
-        url: The URL to fetch the content of.
+        urls: List of URLs to probe.
+        max_concurrent: Maximum number of concurrent probes.
 
     Returns:
-        dict[str, int|str]: A dictionary containing the status code, content of the URL, and any error messages.
+        List of probe results, in the same order as `urls`.
     """
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
-            page = context.new_page()
+    if not urls:
+        return []
+
+    return RunnableLambda(probe_url).batch(
+        urls,
+        config={"max_concurrency": max_concurrent}
+    )
+
+
+async def async_probe_urls(urls: list[str], max_concurrent: int = FETCH_CONCURRENCY) -> list[dict[str, Any]]:
+    """
+    Async version of `probe_urls`. The probes themselves are cheap blocking requests
+    and run in the event loop's default executor.
+
+    Args:
+        urls: List of URLs to probe.
+        max_concurrent: Maximum number of concurrent probes.
+
+    Returns:
+        List of probe results, in the same order as `urls`.
+    """
+    if not urls:
+        return []
+
+    return await RunnableLambda(probe_url).abatch(
+        urls,
+        config={"max_concurrency": max_concurrent}
+    )
+
+
+# Private-use characters, which never occur in page text
+_HEADING_MARK = "\ue000"
+_HEADING_END_MARK = "\ue001"
+_HEADING_MARK_PATTERN = re.compile(rf" ?{_HEADING_MARK}(\d){_HEADING_MARK} ?")
+
+
+def _html_to_text(content_html: str | bytes, from_encoding: str | None = None) -> str:
+    """
+    Extract readable text from an HTML document.
+    """
+    # Deferred: only pages that are actually fetched need the HTML parser
+    from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+
+    # Parse the content with BeautifulSoup
+    beautiful_soup = BeautifulSoup(
+        content_html, 'html.parser', from_encoding=from_encoding if isinstance(content_html, bytes) else None)
+
+    # Remove script and style elements
+    for script in beautiful_soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    # Mark headings so they survive whitespace cleanup; the summarizer splits pages on them
+    for heading in beautiful_soup(["h1", "h2", "h3", "h4", "h5", "h6"]):
+        heading.insert_before(f"{_HEADING_MARK}{heading.name[1]}{_HEADING_MARK}")
+        heading.insert_after(_HEADING_END_MARK)
+
+    text = beautiful_soup.get_text(separator=" ", strip=True)
+
+    # Clean up extra whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = _HEADING_MARK_PATTERN.sub(lambda m: f"\n\n{'#' * int(m.group(1))} ", text)
+    text = re.sub(rf' ?{_HEADING_END_MARK} ?', '\n', text).strip()
+
+    # Not truncated: the summarizer chunks long pages itself, and prompts take previews
+    return text
 
-            # Navigate to the URL with a timeout
-            response = page.goto(url, timeout=30000, wait_until='networkidle')
 
-            if response is None:
-                browser.close()
-                return {
-                    "url": url,
-                    "status_code": 0,
-                    "content": "Failed to load page"
-                }
+_JS_SHELL_MARKERS = re.compile(
+    rb'<noscript|<div id="(?:root|app|__next|__nuxt)"\s*>\s*</div>|<app-root', re.IGNORECASE)
 
-            status_code = response.status
 
-            # Wait a bit for any dynamic content to load
-            page.wait_for_timeout(2000)
+def _looks_js_rendered(content_html: bytes, text: str) -> bool:
+    """
+    Check whether a statically fetched page needs a browser to render its content.
+    """
+    if len(text) < FETCH_MIN_TEXT_CHARS:
+        return True
+    # A short page with a <noscript> fallback or an empty SPA mount point is a shell
+    return len(text) < FETCH_SHELL_TEXT_CHARS and _JS_SHELL_MARKERS.search(content_html) is not None
 
-            # Get the page content after JavaScript execution
-            content_html = page.content()
 
-            browser.close()
+def _fetch_http(url: str, cached: dict[str, Any] | None = None) -> tuple[dict[str, int | str] | None, dict[str, str]]:
+    """
+    Fetch a URL with the pooled HTTP client.
 
-            # Parse the content with BeautifulSoup
-            beautiful_soup = BeautifulSoup(content_html, 'html.parser')
+    Args:
+        url: The URL to fetch.
+        cached: A stale page cache record to revalidate with If-None-Match/If-Modified-Since.
 
-            # Remove script and style elements
-            for script in beautiful_soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
+    Returns:
+        tuple: The fetch result (status 304 when `cached` is still valid), or None if the page
+        should be rendered in a browser, and the response's cache validators (`etag`, `last_modified`).
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
 
-            text = beautiful_soup.get_text(separator=" ", strip=True)
+    try:
+        response = get_http_session().get(
+            url, headers=headers, timeout=FETCH_HTTP_TIMEOUT_SECONDS, allow_redirects=True)
+    except requests.RequestException:
+        # Let the browser try; it may cope with TLS or protocol quirks
+        return None, {}
+
+    record(bytes_downloaded=len(response.content))
+
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+
+    # Not modified: the caller keeps serving its cached copy
+    if response.status_code == 304 and cached:
+        return {"url": url, "status_code": 304, "content": "", "fetch_tier": "http"}, validators
+
+    # Bot walls and rate limits frequently only let real browsers through
+    if response.status_code in (401, 403, 429, 503):
+        return None, {}
+
+    content_type = response.headers.get("Content-Type", "").lower()
+    if response.status_code == 200 and "html" in content_type:
+        from_encoding = response.encoding if "charset" in content_type else None
+        text = _html_to_text(response.content, from_encoding=from_encoding)
+        if _looks_js_rendered(response.content, text):
+            return None, {}
+    elif content_type.startswith("text/"):
+        text = re.sub(r'\s+', ' ', response.text).strip()
+    elif response.status_code == 200:
+        text = f"Non-HTML content ({content_type or 'unknown type'})"
+    else:
+        text = ""
 
-            # Clean up extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
+    return {
+        "url": url,
+        "status_code": response.status_code,
+        "content": text if text else "No content found in the URL",
+        "fetch_tier": "http"
+    }, validators
+
+
+def _cache_validators(entry: dict[str, Any]) -> dict[str, str]:
+    return {key: entry[key] for key in ("etag", "last_modified") if entry.get(key)}
 
-            # Limit content size to avoid overwhelming the LLM
-            max_content_length = 50000  # ~50k characters
-            if len(text) > max_content_length:
-                text = text[:max_content_length] + "... (content truncated)"
 
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key.
+
+    Lowercases the scheme and host, drops default ports and fragments, and gives
+    empty paths a trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+async def _fetch_browser_on_pool(url: str, timeout: int = FETCH_TIMEOUT_MS) -> dict[str, int | str]:
+    """
+    Render and extract a single URL in the shared browser. Must run on the browser pool's event loop.
+    """
+    # Deferred: Playwright is only needed once a page falls through to the browser tier
+    from playwright.async_api import (  # pylint: disable=import-outside-toplevel
+        Error as PlaywrightError,
+        TimeoutError as PlaywrightTimeoutError,
+    )
+
+    try:
+        page = await get_browser_pool().fetch_page(url, timeout=timeout)
+
+        if page is None:
             return {
                 "url": url,
-                "status_code": status_code,
-                "content": text if text else "No content found in the URL"
+                "status_code": 0,
+                "content": "Failed to load page",
+                "fetch_tier": "browser"
             }
 
+        status_code, content_html = page
+        record(bytes_downloaded=len(content_html.encode("utf-8")), browser_renders=1)
+        # Keep HTML parsing off the event loop so other pages keep loading
+        text = await asyncio.to_thread(_html_to_text, content_html)
+
+        return {
+            "url": url,
+            "status_code": status_code,
+            "content": text if text else "No content found in the URL",
+            "fetch_tier": "browser"
+        }
+
     except PlaywrightTimeoutError:
         return {
             "url": url,
             "status_code": 408,
-            "content": "Request timeout - page took too long to load"
+            "content": "Request timeout - page took too long to load",
+            "fetch_tier": "browser"
         }
-    except (OSError, RuntimeError) as e:
+    except (PlaywrightError, OSError, RuntimeError) as e:
         # Handle network errors, browser launch errors, etc.
         return {
             "url": url,
             "status_code": 0,
-            "content": f"Error fetching URL content: {str(e)}"
+            "content": f"Error fetching URL content: {str(e)}",
+            "fetch_tier": "browser"
+        }
+
+
+async def _fetch_url_content_on_pool(url: str) -> dict[str, int | str]:
+    """
+    Fetch a URL through the page cache, then over plain HTTP, escalating to the
+    headless browser only when needed. Must run on the browser pool's event loop.
+    """
+    cache = get_page_cache()
+    key = normalize_url(url)
+    entry = await asyncio.to_thread(cache.lookup, key) if cache else None
+
+    if entry is not None and (FETCH_OFFLINE or not entry.expired):
+        cache.count("hits")
+        record_fetch(cache_hit=True)
+        return {**entry.value["result"], "url": url}
+
+    record_fetch()
+
+    if cache:
+        cache.count("misses")
+
+    if FETCH_OFFLINE:
+        return {
+            "url": url,
+            "status_code": 0,
+            "content": "Offline mode - URL not found in the page cache",
+            "fetch_tier": "none"
         }
+
+    result, validators = await asyncio.to_thread(
+        _fetch_http, url, entry.value if entry else None)
+    if result is not None and result["status_code"] == 304 and entry is not None:
+        cache.count("revalidated")
+        record(cache_hits=1, cache_revalidations=1)
+        result = entry.value["result"]
+        validators = {**_cache_validators(entry.value), **validators}
+    elif result is None:
+        result = await _fetch_browser_on_pool(url)
+
+    # Transient failures are not worth remembering
+    if cache and result["status_code"] not in (0, 408, 429) and result["status_code"] < 500:
+        await asyncio.to_thread(cache.set, key, {"result": result, **validators})
+
+    return {**result, "url": url}
+
+
+async def _fetch_many_on_pool(urls: list[str], concurrency: int, per_host_concurrency: int,
+                              deadline: float | None) -> list[dict[str, int | str]]:
+    """
+    Fetch many URLs concurrently. Must run on the browser pool's event loop.
+    """
+    total_slots = asyncio.Semaphore(concurrency)
+    host_slots: dict[str, asyncio.Semaphore] = {}
+
+    async def _fetch_one(url: str) -> dict[str, int | str]:
+        host = urlparse(url).netloc.lower()
+        host_slot = host_slots.setdefault(
+            host, asyncio.Semaphore(per_host_concurrency))
+        async with host_slot, total_slots:
+            return await _fetch_url_content_on_pool(url)
+
+    tasks = [asyncio.create_task(_fetch_one(url)) for url in urls]
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    results = []
+    for url, task in zip(urls, tasks):
+        if task in pending:
+            results.append({
+                "url": url,
+                "status_code": 408,
+                "content": "Request timeout - fetch deadline exceeded",
+                "fetch_tier": "none"
+            })
+        elif task.exception() is not None:
+            results.append({
+                "url": url,
+                "status_code": 0,
+                "content": f"Error fetching URL content: {str(task.exception())}",
+                "fetch_tier": "none"
+            })
+        else:
+            results.append(task.result())
+    return results
+
+
+async def async_fetch_url_content(url: str) -> dict[str, int | str]:
+    """
+    Asynchronously fetch the content of a URL.
+
+    Static pages are served by the pooled HTTP client; pages that look JavaScript-rendered
+    are escalated to the shared headless browser. `fetch_tier` records which one answered.
+
+    Args:
+        url: The URL to fetch the content of.
+
+    Returns:
+        dict[str, int|str]: A dictionary containing the status code, content of the URL, and any error messages.
+    """
+    future = get_browser_pool().submit(_fetch_url_content_on_pool(url))
+    return await asyncio.wrap_future(future)
+
+
+async def async_fetch_many(urls: list[str],
+                           concurrency: int = FETCH_CONCURRENCY,
+                           per_host_concurrency: int = FETCH_PER_HOST_CONCURRENCY,
+                           deadline: float | None = FETCH_DEADLINE_SECONDS) -> list[dict[str, int | str]]:
+    """
+    Asynchronously fetch many URLs, driving all pages from one event loop and one browser.
+
+    Args:
+        urls: The URLs to fetch.
+        concurrency: Maximum number of pages loading at once.
+        per_host_concurrency: Maximum number of pages loading at once per host.
+        deadline: Total time budget in seconds. URLs still loading when it expires get a 408.
+
+    Returns:
+        list[dict[str, int|str]]: One result per URL, in the same order as `urls`.
+    """
+    if not urls:
+        return []
+    future = get_browser_pool().submit(
+        _fetch_many_on_pool(urls, concurrency, per_host_concurrency, deadline))
+    return await asyncio.wrap_future(future)
+
+
+def fetch_many(urls: list[str],
+               concurrency: int = FETCH_CONCURRENCY,
+               per_host_concurrency: int = FETCH_PER_HOST_CONCURRENCY,
+               deadline: float | None = FETCH_DEADLINE_SECONDS) -> list[dict[str, int | str]]:
+    """
+    Fetch many URLs concurrently. Synchronous wrapper around `async_fetch_many`.
+    """
+    if not urls:
+        return []
+    return get_browser_pool().run(
+        _fetch_many_on_pool(urls, concurrency, per_host_concurrency, deadline))
+
+
+def fetch_url_content(url: str) -> dict[str, int | str]:
+    """
+    Fetch the content of a URL, using a headless browser to handle JavaScript-rendered content.
+
+    Synchronous wrapper around `async_fetch_url_content`; static pages are fetched over
+    plain HTTP and only JavaScript-rendered pages are rendered in the shared browser.
+
+    Args:
+        url: The URL to fetch the content of.
+
+    Returns:
+        dict[str, int|str]: A dictionary containing the status code, content of the URL, any error
+        messages, and the `fetch_tier` ("http" or "browser") that produced it.
+    """
+    return get_browser_pool().run(_fetch_url_content_on_pool(url))